@@ -7,6 +7,11 @@ class Settings(BaseSettings):
     # MongoDB
     mongodb_uri: str = "mongodb://localhost:27017"
     database_name: str = "proof_of_skill"
+    mongodb_max_pool_size: int = 20
+    mongodb_min_pool_size: int = 5
+    mongodb_wait_queue_timeout_ms: int = 2000
+    # Days before raw analytics events expire via a TTL index (0 keeps them forever)
+    events_retention_days: int = 0
 
     # JWT
     jwt_secret: str = "development-secret-change-in-production"
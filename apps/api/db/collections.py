@@ -42,6 +42,10 @@ class Collections:
     def proctoring_sessions():
         return get_db().proctoring_sessions
 
+    @staticmethod
+    def violation_events():
+        return get_db().violation_events
+
     @staticmethod
     def chat_messages():
         return get_db().chat_messages
@@ -54,6 +58,10 @@ class Collections:
     def applications():
         return get_db().applications
 
+    @staticmethod
+    def candidate_analyses():
+        return get_db().candidate_analyses
+
     @staticmethod
     def db():
         return get_db()
@@ -1,4 +1,5 @@
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo.errors import DuplicateKeyError, OperationFailure
 from config import get_settings
 
 _client: AsyncIOMotorClient | None = None
@@ -8,23 +9,143 @@ _db: AsyncIOMotorDatabase | None = None
 async def connect_db():
     global _client, _db
     settings = get_settings()
-    _client = AsyncIOMotorClient(settings.mongodb_uri)
+    # One process-wide client with a modest, pre-warmed connection pool
+    _client = AsyncIOMotorClient(
+        settings.mongodb_uri,
+        maxPoolSize=settings.mongodb_max_pool_size,
+        minPoolSize=settings.mongodb_min_pool_size,
+        waitQueueTimeoutMS=settings.mongodb_wait_queue_timeout_ms,
+    )
     _db = _client[settings.database_name]
+    await _client.admin.command("ping")
 
     # Create indexes
     await _db.users.create_index("email", unique=True)
+    # Recruiter candidate listings filter users by role
+    await _db.users.create_index("role")
     await _db.events.create_index([("user_id", 1), ("timestamp", -1)])
-    await _db.events.create_index("session_id")
+    # Latest events for a session (frustration scoring sorts by timestamp desc).
+    # Its session_id prefix also serves plain session_id lookups, so the older
+    # single-field index is redundant write cost on this busy collection.
+    await _db.events.create_index([("session_id", 1), ("timestamp", -1)])
+    # Latest events of given types for a session (frustration scoring's $in
+    # on event_type merges the per-type ranges in timestamp order)
+    await _db.events.create_index(
+        [("session_id", 1), ("event_type", 1), ("timestamp", -1)]
+    )
+    await _drop_index_if_exists(_db.events, "session_id_1")
+    if settings.events_retention_days > 0:
+        await _ensure_events_ttl(settings.events_retention_days * 24 * 60 * 60)
     await _db.sessions.create_index("user_id")
     await _db.sessions.create_index("session_id", unique=True)
+    # Submitted session counts per candidate (recruiter listings, passports)
+    await _db.sessions.create_index([("user_id", 1), ("submitted", 1)])
+    # Serves the "latest active session" lookup ({user_id, ended_at: None}
+    # sorted by started_at desc) as an index range scan with no in-memory sort.
+    # ended_at is a key rather than a partial filter because ended_at: None
+    # also matches sessions that never had the field set.
+    await _db.sessions.create_index(
+        [("user_id", 1), ("ended_at", 1), ("started_at", -1)],
+        name="active_sessions_idx",
+    )
     await _db.passports.create_index("user_id", unique=True)
     await _db.tasks.create_index("task_id", unique=True)
     await _db.jobs.create_index("job_id", unique=True)
     await _db.skill_proficiencies.create_index("user_id", unique=True)
+    # Latest (un)acknowledged intervention for a session, sorted by trigger time
+    await _db.interventions.create_index(
+        [("session_id", 1), ("user_id", 1), ("acknowledged", 1), ("triggered_at", -1)]
+    )
+    # A user's recent interventions (AI worker history and error profile)
+    await _db.interventions.create_index([("user_id", 1), ("triggered_at", -1)])
+    await _db.proctoring_sessions.create_index(
+        [("session_id", 1), ("user_id", 1)], unique=True
+    )
+    await _ensure_single_active_proctoring_index()
+    await _db.violation_events.create_index([("session_id", 1), ("timestamp", 1)])
+    await _db.videos.create_index([("session_id", 1), ("user_id", 1)])
+    # A candidate's videos, newest first (recruiter video list)
+    await _db.videos.create_index([("user_id", 1), ("uploaded_at", -1)])
+    # Only analyzed videos, for the proctoring analysis lookups
+    await _db.videos.create_index(
+        "session_id",
+        name="session_id_analyzed",
+        partialFilterExpression={"behavioral_analysis": {"$exists": True}},
+    )
+    await _ensure_unique_proctoring_reports_index()
+    # Cached recruiter fit analyses are dropped after a week
+    await _db.candidate_analyses.create_index(
+        "cached_at", expireAfterSeconds=7 * 24 * 60 * 60
+    )
 
     print("Connected to MongoDB")
 
 
+async def _ensure_single_active_proctoring_index():
+    """At most one active proctoring session per user and task."""
+    try:
+        await _db.proctoring_sessions.create_index(
+            [("user_id", 1), ("task_id", 1)],
+            unique=True,
+            partialFilterExpression={"status": "active"},
+        )
+    except DuplicateKeyError:
+        # Older data can hold duplicate active sessions; don't block startup
+        print(
+            "[MongoDB] WARNING: duplicate active proctoring sessions prevent the "
+            "one-active-session index; run scripts/dedupe_active_proctoring_sessions.py"
+        )
+
+
+async def _drop_index_if_exists(collection, name: str):
+    """Drop an index that has been superseded, if this database still has it."""
+    try:
+        await collection.drop_index(name)
+    except OperationFailure as e:
+        # IndexNotFound: already dropped (or never created)
+        if e.code != 27:
+            raise
+
+
+async def _ensure_unique_proctoring_reports_index():
+    """One stored proctoring report per session."""
+    reports = _db.proctoring_reports
+    try:
+        try:
+            await reports.create_index("session_id", unique=True)
+        except OperationFailure as e:
+            if isinstance(e, DuplicateKeyError):
+                raise
+            # Replaces the earlier non-unique index on the same key
+            await reports.drop_index("session_id_1")
+            await reports.create_index("session_id", unique=True)
+    except DuplicateKeyError:
+        # Older data can hold several reports per session; keep report reads
+        # indexed and don't block startup
+        await reports.create_index("session_id")
+        print(
+            "[MongoDB] WARNING: duplicate proctoring reports prevent the unique "
+            "session_id index; run scripts/dedupe_proctoring_reports.py"
+        )
+
+
+async def _ensure_events_ttl(expire_after_seconds: int):
+    """Let MongoDB expire old events by timestamp instead of keeping them forever."""
+    try:
+        await _db.events.create_index(
+            "timestamp",
+            name="events_ttl",
+            expireAfterSeconds=expire_after_seconds,
+        )
+    except OperationFailure:
+        # The index exists with another retention period; update it in place
+        await _db.command(
+            "collMod",
+            "events",
+            index={"name": "events_ttl", "expireAfterSeconds": expire_after_seconds},
+        )
+
+
 async def close_db():
     global _client
     if _client:
@@ -4,6 +4,11 @@ from contextlib import asynccontextmanager
 
 from config import get_settings
 from db.mongo import connect_db, close_db
+from middleware.upload_limit import UploadSizeLimitMiddleware
+from services.amplitude import close_amplitude_client, flush_amplitude_events
+from services.backboard import close_backboard_client
+from services.event_writer import event_writer
+from services.violation_queue import violation_queue
 from routes import auth, passkey, track, tasks, jobs, passport, video, radar, proctoring, proctoring_analysis, analytics, chat, recruiter, applications, replay, notifications
 
 
@@ -13,6 +18,11 @@ async def lifespan(app: FastAPI):
     await connect_db()
     yield
     # Shutdown
+    await violation_queue.flush()
+    await event_writer.flush()
+    await flush_amplitude_events()
+    await close_amplitude_client()
+    await close_backboard_client()
     await close_db()
 
 
@@ -25,6 +35,14 @@ app = FastAPI(
 
 settings = get_settings()
 
+# Recruiter interview uploads are capped before their body is spooled (added
+# first so the CORS middleware still wraps its 413 responses)
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    max_bytes=recruiter.MAX_VIDEO_UPLOAD_BYTES,
+    path_pattern=r"/recruiter/candidates/[^/]+/video",
+)
+
 # CORS - explicit origins for credential support
 app.add_middleware(
     CORSMiddleware,
@@ -4,6 +4,7 @@ from typing import Optional
 from utils.jwt import verify_token
 from db.collections import Collections
 from models.auth import TokenData
+from utils.cache import AsyncTTLCache
 
 security = HTTPBearer(auto_error=False)
 security_optional = HTTPBearer(auto_error=False)
@@ -24,6 +25,22 @@ DEV_RECRUITER = {
 }
 
 
+# Every authenticated request resolves its user, and identity fields rarely
+# change, so the lookup is cached briefly by user_id. The token itself is
+# still verified on every request.
+_user_cache = AsyncTTLCache(maxsize=4096, ttl=30.0)
+
+
+async def _load_user(user_id: str) -> Optional[dict]:
+    return await _user_cache.get(
+        user_id,
+        lambda: Collections.users().find_one(
+            {"_id": user_id},
+            projection={"email": 1, "role": 1, "display_name": 1},
+        ),
+    )
+
+
 async def get_current_user(
     request: Request,
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
@@ -52,7 +69,7 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    user = await Collections.users().find_one({"_id": token_data.user_id})
+    user = await _load_user(token_data.user_id)
 
     if user is None:
         raise HTTPException(
@@ -88,7 +105,7 @@ async def get_current_user_optional(
     if token_data is None:
         return None
 
-    user = await Collections.users().find_one({"_id": token_data.user_id})
+    user = await _load_user(token_data.user_id)
     if user is None:
         return None
 
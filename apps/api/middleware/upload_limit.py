@@ -0,0 +1,72 @@
+import re
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class _UploadTooLarge(Exception):
+    pass
+
+
+class UploadSizeLimitMiddleware:
+    """Reject request bodies above a size limit on matching upload routes.
+
+    Form uploads are fully received and spooled before a route handler runs,
+    so a size check inside the handler cannot stop an oversized body. This
+    rejects by Content-Length before any of the body is read, and counts the
+    bytes of bodies sent without one, answering 413 as soon as they pass the
+    limit.
+    """
+
+    def __init__(self, app: ASGIApp, max_bytes: int, path_pattern: str):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.path_re = re.compile(path_pattern)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.path_re.fullmatch(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                try:
+                    content_length = int(value)
+                except ValueError:
+                    break
+                if content_length > self.max_bytes:
+                    await self._reject(scope, receive, send)
+                    return
+                break
+
+        received = 0
+        response_started = False
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    raise _UploadTooLarge()
+            return message
+
+        async def tracked_send(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracked_send)
+        except _UploadTooLarge:
+            if response_started:
+                raise
+            await self._reject(scope, receive, send)
+
+    async def _reject(self, scope: Scope, receive: Receive, send: Send) -> None:
+        response = JSONResponse(
+            {"detail": f"Upload exceeds the {self.max_bytes >> 30} GiB limit."},
+            status_code=413,
+        )
+        await response(scope, receive, send)
@@ -75,6 +75,7 @@ class PassportInDB(BaseModel):
     metrics: dict = Field(default_factory=dict)
     notable_sessions: list[dict] = []
     interview_video_id: Optional[str] = None
+    interview_video_ready: bool = False
     interview_highlights: list[dict] = []
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
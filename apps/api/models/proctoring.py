@@ -25,6 +25,7 @@ class ProctoringViolation(BaseModel):
     violation_type: ViolationType
     timestamp: datetime = Field(default_factory=datetime.utcnow)
     details: Optional[str] = None
+    count: int = 1  # Identical violations in a burst are merged into one entry
 
 
 class ProctoringAgreement(BaseModel):
@@ -41,6 +42,7 @@ class ProctoringSession(BaseModel):
     status: ProctoringStatus = ProctoringStatus.ACTIVE
     camera_enabled: bool = False
     violations: list[ProctoringViolation] = Field(default_factory=list)
+    violation_count: int = 0
     started_at: datetime = Field(default_factory=datetime.utcnow)
     ended_at: Optional[datetime] = None
 
@@ -123,11 +123,8 @@ async def get_job_applicants(
         # Get passport for metrics
         passport = await Collections.passports().find_one({"user_id": user_id})
 
-        # Get sessions count
-        sessions_count = await Collections.sessions().count_documents({
-            "user_id": user_id,
-            "submitted": True,
-        })
+        # Submitted session count (denormalized on the user)
+        sessions_count = user.get("sessions_completed", 0)
 
         # Compute fit score
         user_skill_vector = passport.get("skill_vector", []) if passport else []
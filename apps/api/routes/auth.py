@@ -56,6 +56,7 @@ async def register(user_data: UserCreate):
             },
             "notable_sessions": [],
             "interview_video_id": None,
+            "interview_video_ready": False,
             "interview_highlights": [],
             "updated_at": datetime.utcnow(),
         }
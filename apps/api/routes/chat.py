@@ -7,15 +7,15 @@ Provides Gemini-powered task help chat:
 - Full conversation history with Amplitude tracking
 """
 
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
-from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException
 from bson import ObjectId
 
 from middleware.auth import get_current_user
 from db.collections import Collections
 from models.chat import ChatMessage, ChatResponse, ChatHistoryResponse, ChatHistoryEntry
 from services.backboard import BackboardService
-from services.amplitude import forward_to_amplitude
+from services.amplitude import enqueue_amplitude_event
+from utils.timeutils import utc_now
 
 router = APIRouter()
 
@@ -23,7 +23,6 @@ router = APIRouter()
 @router.post("/task-help", response_model=ChatResponse)
 async def task_help_chat(
     request: ChatMessage,
-    background_tasks: BackgroundTasks,
     current_user: dict = Depends(get_current_user),
 ):
     """
@@ -62,7 +61,7 @@ async def task_help_chat(
     
     # Store chat message and response
     chat_id = str(ObjectId())
-    timestamp = datetime.utcnow()
+    timestamp, timestamp_ms = utc_now()
     
     # Store user message
     await Collections.chat_messages().insert_one({
@@ -107,12 +106,11 @@ async def task_help_chat(
     }
     await Collections.events().insert_one(request_event)
     
-    background_tasks.add_task(
-        forward_to_amplitude,
+    enqueue_amplitude_event(
         event_id=request_event_id,
         user_id=current_user["user_id"],
         event_type="chat_help_requested",
-        timestamp=int(timestamp.timestamp() * 1000),
+        timestamp=timestamp_ms,
         properties={
             "session_id": request.session_id,
             "task_id": request.task_id,
@@ -136,12 +134,11 @@ async def task_help_chat(
     }
     await Collections.events().insert_one(response_event)
     
-    background_tasks.add_task(
-        forward_to_amplitude,
+    enqueue_amplitude_event(
         event_id=response_event_id,
         user_id=current_user["user_id"],
         event_type="chat_help_response_received",
-        timestamp=int(timestamp.timestamp() * 1000),
+        timestamp=timestamp_ms,
         properties={
             "session_id": request.session_id,
             "task_id": request.task_id,
@@ -7,9 +7,32 @@ from middleware.auth import get_current_user
 from db.collections import Collections
 from models.job import JobMatch, JobsResponse, UnlockRequirements, JobCreate, RecruiterJob
 from services.skillgraph import compute_job_fit
+from utils.cache import AsyncTTLCache
 
 router = APIRouter()
 
+# Job postings only change through the create/delete routes below, which
+# invalidate these caches. The recruiter ranking, fit analysis and job picker
+# read them on every request.
+_job_cache = AsyncTTLCache(maxsize=1024, ttl=60.0)
+recruiter_job_list_cache = AsyncTTLCache(maxsize=1, ttl=30.0)
+
+
+async def get_cached_job(job_id: str) -> dict | None:
+    """Fetch the job fields used for candidate ranking and fit analysis."""
+    return await _job_cache.get(
+        job_id,
+        lambda: Collections.jobs().find_one(
+            {"job_id": job_id},
+            projection={"_id": 0, "target_radar": 1, "must_have": 1, "description": 1, "title": 1},
+        ),
+    )
+
+
+def _invalidate_job(job_id: str) -> None:
+    _job_cache.invalidate(job_id)
+    recruiter_job_list_cache.invalidate()
+
 
 def compute_radar_fit(candidate_radar: dict, job_target_radar: dict) -> float:
     """
@@ -64,10 +87,8 @@ async def list_jobs(
     user_doc = await Collections.users().find_one({"_id": current_user["user_id"]})
     user_radar_profile = user_doc.get("radar_profile", {}) if user_doc else {}
 
-    # Get sessions count
-    sessions_count = await Collections.sessions().count_documents(
-        {"user_id": current_user["user_id"], "submitted": True}
-    )
+    # Submitted session count (denormalized on the user)
+    sessions_count = user_doc.get("sessions_completed", 0) if user_doc else 0
 
     # Get all jobs
     cursor = Collections.jobs().find({})
@@ -186,6 +207,7 @@ async def create_job(
     }
 
     await Collections.jobs().insert_one(job_doc)
+    _invalidate_job(job_id)
 
     return RecruiterJob(
         job_id=job_id,
@@ -261,5 +283,6 @@ async def delete_job(
         )
 
     await Collections.jobs().delete_one({"job_id": job_id})
+    _invalidate_job(job_id)
 
     return {"message": "Job deleted successfully"}
@@ -1,7 +1,9 @@
 from fastapi import APIRouter, HTTPException, status, Depends
+from collections import OrderedDict
 from datetime import datetime
 import json
 import base64
+import time
 
 from middleware.auth import get_current_user
 from db.collections import Collections
@@ -20,7 +22,52 @@ from utils.jwt import create_access_token
 router = APIRouter()
 
 # In-memory challenge store (use Redis in production)
-_challenges: dict[str, bytes] = {}
+CHALLENGE_TTL_SECONDS = 300
+MAX_PENDING_CHALLENGES = 10_000
+
+
+class _ChallengeStore:
+    """FIFO challenge store with a TTL and a size cap.
+
+    Abandoned begin ceremonies are evicted instead of pinning memory forever.
+    Entries are kept in insertion order, so the oldest is always at the front.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._entries: OrderedDict[str, tuple[bytes, float]] = OrderedDict()
+
+    def _purge(self, now: float) -> None:
+        while self._entries:
+            _, expires_at = next(iter(self._entries.values()))
+            if expires_at > now and len(self._entries) < self._maxsize:
+                break
+            self._entries.popitem(last=False)
+
+    def set(self, key: str, challenge: bytes) -> None:
+        now = time.monotonic()
+        # Re-inserting moves the key to the back with a fresh expiry
+        self._entries.pop(key, None)
+        self._purge(now)
+        self._entries[key] = (challenge, now + self._ttl)
+
+    def pop(self, key: str) -> bytes | None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+        challenge, expires_at = entry
+        if expires_at <= time.monotonic():
+            return None
+        return challenge
+
+
+_challenges = _ChallengeStore(MAX_PENDING_CHALLENGES, CHALLENGE_TTL_SECONDS)
+
+
+def _b64encode(data: bytes) -> str:
+    """Base64-encode bytes to a str (the b64 alphabet is pure ASCII)."""
+    return base64.b64encode(data).decode("ascii")
 
 
 @router.post("/register/begin", response_model=PasskeyRegisterBeginResponse)
@@ -63,14 +110,14 @@ async def passkey_register_begin(current_user: dict = Depends(get_current_user))
     )
 
     # Store challenge
-    _challenges[user_id] = options.challenge
+    _challenges.set(user_id, options.challenge)
 
     return PasskeyRegisterBeginResponse(
         options={
-            "challenge": base64.b64encode(options.challenge).decode(),
+            "challenge": _b64encode(options.challenge),
             "rp": {"name": options.rp.name, "id": options.rp.id},
             "user": {
-                "id": base64.b64encode(options.user.id).decode(),
+                "id": _b64encode(options.user.id),
                 "name": options.user.name,
                 "displayName": options.user.display_name,
             },
@@ -102,7 +149,7 @@ async def passkey_register_complete(
     user_id = current_user["user_id"]
 
     # Get stored challenge
-    challenge = _challenges.pop(user_id, None)
+    challenge = _challenges.pop(user_id)
     if not challenge:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -128,8 +175,8 @@ async def passkey_register_complete(
 
         # Store credential
         credential_doc = {
-            "credential_id": base64.b64encode(verification.credential_id).decode(),
-            "public_key": base64.b64encode(verification.credential_public_key).decode(),
+            "credential_id": _b64encode(verification.credential_id),
+            "public_key": _b64encode(verification.credential_public_key),
             "sign_count": verification.sign_count,
             "created_at": datetime.utcnow(),
         }
@@ -183,18 +230,16 @@ async def passkey_auth_begin(data: PasskeyAuthBeginRequest):
     )
 
     # Store challenge
-    _challenges[data.email] = options.challenge
+    _challenges.set(data.email, options.challenge)
 
     return PasskeyAuthBeginResponse(
         options={
-            "challenge": base64.b64encode(options.challenge).decode(),
+            "challenge": _b64encode(options.challenge),
             "timeout": options.timeout,
             "rpId": settings.webauthn_rp_id,
+            # credential_id is already stored base64-encoded, so no re-encode needed
             "allowCredentials": [
-                {
-                    "id": base64.b64encode(base64.b64decode(c["credential_id"])).decode(),
-                    "type": "public-key",
-                }
+                {"id": c["credential_id"], "type": "public-key"}
                 for c in credentials
             ],
         }
@@ -216,7 +261,7 @@ async def passkey_auth_complete(data: PasskeyAuthCompleteRequest):
     settings = get_settings()
 
     # Get stored challenge
-    challenge = _challenges.pop(data.email, None)
+    challenge = _challenges.pop(data.email)
     if not challenge:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
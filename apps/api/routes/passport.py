@@ -134,9 +134,7 @@ async def get_passport(user_id: str, request: Request, current_user: dict = Depe
         )
 
     # Get session stats
-    sessions_completed = await Collections.sessions().count_documents(
-        {"user_id": user_id, "submitted": True}
-    )
+    sessions_completed = user.get("sessions_completed", 0)
     tasks_passed = await Collections.sessions().count_documents(
         {"user_id": user_id, "passed": True}
     )
@@ -152,9 +150,11 @@ async def get_passport(user_id: str, request: Request, current_user: dict = Depe
             confidence=passport.get("archetype_confidence", 0.0),
         )
 
+    # Passport documents are validated when written, so the nested response
+    # models below are built with model_construct to skip re-validation.
     # Build metrics
     metrics_data = passport.get("metrics", {})
-    metrics = PassportMetrics(
+    metrics = PassportMetrics.model_construct(
         iteration_velocity=metrics_data.get("iteration_velocity", 0.0),
         debug_efficiency=metrics_data.get("debug_efficiency", 0.0),
         craftsmanship=metrics_data.get("craftsmanship", 0.0),
@@ -164,7 +164,7 @@ async def get_passport(user_id: str, request: Request, current_user: dict = Depe
 
     # Build notable moments
     notable_moments = [
-        NotableMoment(
+        NotableMoment.model_construct(
             type=m.get("type", "achievement"),
             description=m.get("highlight", m.get("description", "")),
             session_id=m.get("session_id"),
@@ -187,7 +187,7 @@ async def get_passport(user_id: str, request: Request, current_user: dict = Depe
             else:
                 timestamp = str(start_seconds)
 
-            highlights.append(InterviewHighlight(
+            highlights.append(InterviewHighlight.model_construct(
                 timestamp=timestamp,
                 description=h.get("transcript", h.get("description", "")),
                 query=h.get("query", h.get("query_matched", "")),
@@ -200,10 +200,10 @@ async def get_passport(user_id: str, request: Request, current_user: dict = Depe
         comm_scores = passport.get("communication_scores", {})
         if comm_scores:
             communication_analysis = CommunicationAnalysis(
-                clarity=CommunicationScore(**comm_scores["clarity"]) if comm_scores.get("clarity") else None,
-                confidence=CommunicationScore(**comm_scores["confidence"]) if comm_scores.get("confidence") else None,
-                collaboration=CommunicationScore(**comm_scores["collaboration"]) if comm_scores.get("collaboration") else None,
-                technical_depth=CommunicationScore(**comm_scores["technical_depth"]) if comm_scores.get("technical_depth") else None,
+                clarity=CommunicationScore.model_construct(**comm_scores["clarity"]) if comm_scores.get("clarity") else None,
+                confidence=CommunicationScore.model_construct(**comm_scores["confidence"]) if comm_scores.get("confidence") else None,
+                collaboration=CommunicationScore.model_construct(**comm_scores["collaboration"]) if comm_scores.get("collaboration") else None,
+                technical_depth=CommunicationScore.model_construct(**comm_scores["technical_depth"]) if comm_scores.get("technical_depth") else None,
             )
 
         interview = InterviewInfo(
@@ -247,21 +247,33 @@ async def get_skill_proficiencies(
             detail="Not authorized to view these proficiencies",
         )
 
-    prof_doc = await Collections.skill_proficiencies().find_one({"user_id": user_id})
-
-    if not prof_doc:
-        return {"proficiencies": []}
+    # Convert the proficiencies dict to a list sorted by score inside MongoDB
+    pipeline = [
+        {"$match": {"user_id": user_id}},
+        {"$project": {
+            "_id": 0,
+            "proficiencies": {
+                "$sortArray": {
+                    "input": {
+                        "$map": {
+                            "input": {"$objectToArray": {"$ifNull": ["$proficiencies", {}]}},
+                            "as": "p",
+                            "in": {
+                                "name": {"$ifNull": ["$$p.v.name", "$$p.k"]},
+                                "score": {"$ifNull": ["$$p.v.score", 0.0]},
+                                "tasks_completed": {"$ifNull": ["$$p.v.tasks_completed", 0]},
+                            },
+                        }
+                    },
+                    "sortBy": {"score": -1},
+                }
+            },
+        }},
+    ]
 
-    # Convert dict to list for frontend
-    proficiencies = []
-    for key, prof in prof_doc.get("proficiencies", {}).items():
-        proficiencies.append({
-            "name": prof.get("name", key),
-            "score": prof.get("score", 0.0),
-            "tasks_completed": prof.get("tasks_completed", 0),
-        })
+    results = await Collections.skill_proficiencies().aggregate(pipeline).to_list(length=1)
 
-    # Sort by score descending
-    proficiencies.sort(key=lambda x: x["score"], reverse=True)
+    if not results:
+        return {"proficiencies": []}
 
-    return {"proficiencies": proficiencies}
+    return {"proficiencies": results[0]["proficiencies"]}
@@ -1,18 +1,24 @@
 from fastapi import APIRouter, HTTPException, status, Depends, BackgroundTasks, UploadFile, File, Form
 from datetime import datetime
-import uuid
+import asyncio
+import logging
 from bson import ObjectId
-import aiofiles
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 import os
 
 from middleware.auth import get_current_user
 from db.collections import Collections
-from services.amplitude import forward_to_amplitude
+from services.event_writer import event_writer
 from services.twelvelabs import upload_video_to_twelvelabs
+from services.violation_queue import violation_queue, MAX_SESSION_VIOLATIONS
+from utils.cache import AsyncTTLCache
+from utils.files import save_upload
+from utils.ids import new_hex_id, new_uuid4
+from utils.timeutils import utc_now
 from models.proctoring import (
     ProctoringSession,
     ProctoringStatus,
-    ProctoringViolation,
     StartProctoringRequest,
     StartProctoringResponse,
     ReportViolationRequest,
@@ -21,6 +27,41 @@ from models.proctoring import (
 
 router = APIRouter()
 
+logger = logging.getLogger("proctoring")
+
+ALLOWED_VIDEO_TYPES = frozenset({
+    "video/mp4",
+    "video/webm",
+    "video/quicktime",
+    "video/x-matroska",
+    "application/octet-stream",  # Some browsers send this for webm
+})
+
+
+def _is_allowed_video_type(content_type: str) -> bool:
+    # Codec variants like "video/webm;codecs=vp9" are covered by the prefix check
+    return content_type in ALLOWED_VIDEO_TYPES or content_type.startswith("video/webm")
+
+
+# Tasks are seeded offline and rarely change, so the proctored flag is cached
+_task_cache = AsyncTTLCache(maxsize=4096, ttl=60.0)
+
+
+async def _get_task(task_id: str) -> dict | None:
+    """Fetch a task's proctoring flag, served from the in-process cache."""
+    return await _task_cache.get(
+        task_id,
+        lambda: Collections.tasks().find_one(
+            {"task_id": task_id},
+            projection={"proctored": 1},
+        ),
+    )
+
+
+async def _persist_violation(violation_doc: dict) -> None:
+    """Append a violation to the uncapped violation_events audit trail."""
+    await Collections.violation_events().insert_one(violation_doc)
+
 
 @router.post("/start", response_model=StartProctoringResponse)
 async def start_proctoring_session(
@@ -29,7 +70,7 @@ async def start_proctoring_session(
 ):
     """Start a proctoring session after user agrees to terms."""
     # Verify task exists and is proctored
-    task = await Collections.tasks().find_one({"task_id": request.task_id})
+    task = await _get_task(request.task_id)
     if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -42,25 +83,8 @@ async def start_proctoring_session(
             detail="Task is not proctored",
         )
 
-    # Check if there's already an active session for this user and task
-    existing = await Collections.proctoring_sessions().find_one({
-        "user_id": current_user["user_id"],
-        "task_id": request.task_id,
-        "status": ProctoringStatus.ACTIVE.value,
-    })
-
-    if existing:
-        return StartProctoringResponse(
-            session_id=existing["session_id"],
-            task_id=existing["task_id"],
-            status=ProctoringStatus(existing["status"]),
-            camera_enabled=existing.get("camera_enabled", False),
-        )
-
-    # Create new proctoring session
-    session_id = str(uuid.uuid4())
     session = ProctoringSession(
-        session_id=session_id,
+        session_id=new_uuid4(),
         user_id=current_user["user_id"],
         task_id=request.task_id,
         status=ProctoringStatus.ACTIVE,
@@ -68,14 +92,37 @@ async def start_proctoring_session(
         violations=[],
         started_at=datetime.utcnow(),
     )
-
-    await Collections.proctoring_sessions().insert_one(session.model_dump())
+    session_doc = session.__pydantic_serializer__.to_python(session, exclude_none=True)
+    active_filter = {
+        "user_id": current_user["user_id"],
+        "task_id": request.task_id,
+        "status": ProctoringStatus.ACTIVE.value,
+    }
+    for key in active_filter:
+        session_doc.pop(key)
+
+    # Reuse the active session for this user and task, or create one, in a
+    # single atomic upsert backed by the partial unique index
+    active = None
+    while active is None:
+        try:
+            active = await Collections.proctoring_sessions().find_one_and_update(
+                active_filter,
+                {"$setOnInsert": session_doc},
+                projection={"session_id": 1, "camera_enabled": 1},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            # A concurrent start won the upsert. Retry it: it now matches the
+            # winner, or inserts again if the winner has already ended
+            continue
 
     return StartProctoringResponse(
-        session_id=session_id,
+        session_id=active["session_id"],
         task_id=request.task_id,
         status=ProctoringStatus.ACTIVE,
-        camera_enabled=request.camera_enabled,
+        camera_enabled=active.get("camera_enabled", False),
     )
 
 
@@ -87,42 +134,67 @@ async def report_violation(
     current_user: dict = Depends(get_current_user),
 ):
     """Report a proctoring violation."""
-    session = await Collections.proctoring_sessions().find_one({
-        "session_id": session_id,
-        "user_id": current_user["user_id"],
-    })
-
-    if not session:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Proctoring session not found",
-        )
+    now, now_ms = utc_now()
+
+    # Known shape (see ProctoringViolation), so build the document directly
+    # instead of constructing and dumping a model per report
+    violation_doc = {
+        "violation_type": request.violation_type.value,
+        "timestamp": now,
+        "details": request.details,
+        "count": 1,
+    }
 
-    if session["status"] != ProctoringStatus.ACTIVE.value:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Proctoring session is not active",
+    # Violations arriving in a burst are buffered and written together
+    task_id = violation_queue.coalesce(session_id, current_user["user_id"], violation_doc)
+
+    if task_id is None:
+        # Assert the session is active and record the violation in one round trip
+        session = await Collections.proctoring_sessions().find_one_and_update(
+            {
+                "session_id": session_id,
+                "user_id": current_user["user_id"],
+                "status": ProctoringStatus.ACTIVE.value,
+            },
+            {
+                "$push": {
+                    "violations": {
+                        "$each": [violation_doc],
+                        "$slice": -MAX_SESSION_VIOLATIONS,
+                    }
+                },
+                "$inc": {"violation_count": 1},
+            },
+            projection={"task_id": 1},
         )
 
-    violation = ProctoringViolation(
-        violation_type=request.violation_type,
-        timestamp=datetime.utcnow(),
-        details=request.details,
-    )
-
-    await Collections.proctoring_sessions().update_one(
-        {"session_id": session_id},
-        {"$push": {"violations": violation.model_dump()}},
-    )
-
-    event_id = str(ObjectId())
+        if not session:
+            # Only distinguish missing vs. inactive sessions on the error path
+            exists = await Collections.proctoring_sessions().find_one(
+                {"session_id": session_id, "user_id": current_user["user_id"]},
+                projection={"_id": 1},
+            )
+            if not exists:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Proctoring session not found",
+                )
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Proctoring session is not active",
+            )
+
+        task_id = session["task_id"]
+        violation_queue.open_window(session_id, current_user["user_id"], task_id)
+
+    event_id = new_hex_id()
     event_doc = {
         "_id": event_id,
         "user_id": current_user["user_id"],
         "session_id": session_id,
-        "task_id": session["task_id"],
+        "task_id": task_id,
         "event_type": "proctoring_violation",
-        "timestamp": datetime.utcnow(),
+        "timestamp": now,
         "properties": {
             "violation_type": request.violation_type,
             "details": request.details,
@@ -131,16 +203,23 @@ async def report_violation(
         "processed_for_ml": False,
     }
 
-    await Collections.events().insert_one(event_doc)
     background_tasks.add_task(
-        forward_to_amplitude,
-        event_id=event_id,
-        user_id=current_user["user_id"],
-        event_type="proctoring_violation",
-        timestamp=int(event_doc["timestamp"].timestamp() * 1000),
-        properties={
+        _persist_violation,
+        {
+            "session_id": session_id,
+            "user_id": current_user["user_id"],
+            "task_id": task_id,
+            "violation_type": violation_doc["violation_type"],
+            "details": violation_doc["details"],
+            "timestamp": violation_doc["timestamp"],
+        },
+    )
+    event_writer.submit(
+        event_doc,
+        timestamp_ms=now_ms,
+        amplitude_properties={
             "session_id": session_id,
-            "task_id": session["task_id"],
+            "task_id": task_id,
             "violation_type": request.violation_type,
             "details": request.details,
         },
@@ -155,19 +234,12 @@ async def end_proctoring_session(
     current_user: dict = Depends(get_current_user),
 ):
     """End a proctoring session."""
-    session = await Collections.proctoring_sessions().find_one({
-        "session_id": session_id,
-        "user_id": current_user["user_id"],
-    })
-
-    if not session:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Proctoring session not found",
-        )
+    # Store violations still buffered for this session while it is active
+    await violation_queue.flush(session_id)
 
-    await Collections.proctoring_sessions().update_one(
-        {"session_id": session_id},
+    # Scope the update to the owner so no separate (full-document) read is needed
+    result = await Collections.proctoring_sessions().update_one(
+        {"session_id": session_id, "user_id": current_user["user_id"]},
         {
             "$set": {
                 "status": ProctoringStatus.ENDED.value,
@@ -176,6 +248,12 @@ async def end_proctoring_session(
         },
     )
 
+    if result.matched_count == 0:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Proctoring session not found",
+        )
+
     return {"success": True, "status": ProctoringStatus.ENDED}
 
 
@@ -185,10 +263,25 @@ async def get_proctoring_session(
     current_user: dict = Depends(get_current_user),
 ):
     """Get proctoring session status."""
-    session = await Collections.proctoring_sessions().find_one({
-        "session_id": session_id,
-        "user_id": current_user["user_id"],
-    })
+    # Count violations server-side rather than shipping the array
+    results = await Collections.proctoring_sessions().aggregate([
+        {"$match": {"session_id": session_id, "user_id": current_user["user_id"]}},
+        {"$limit": 1},
+        {"$project": {
+            "_id": 0,
+            "session_id": 1,
+            "user_id": 1,
+            "task_id": 1,
+            "status": 1,
+            "camera_enabled": 1,
+            "started_at": 1,
+            "ended_at": 1,
+            "violation_count": {
+                "$ifNull": ["$violation_count", {"$size": {"$ifNull": ["$violations", []]}}]
+            },
+        }},
+    ]).to_list(length=1)
+    session = results[0] if results else None
 
     if not session:
         raise HTTPException(
@@ -202,7 +295,7 @@ async def get_proctoring_session(
         task_id=session["task_id"],
         status=ProctoringStatus(session["status"]),
         camera_enabled=session.get("camera_enabled", False),
-        violation_count=len(session.get("violations", [])),
+        violation_count=session["violation_count"],
         started_at=session["started_at"],
         ended_at=session.get("ended_at"),
     )
@@ -223,34 +316,23 @@ async def upload_proctoring_video(
     during a proctored coding session and processes it through TwelveLabs.
     """
     # Validate file type
-    print(f"[DEBUG] Received video upload with content_type: {video.content_type}")
-    print(f"[DEBUG] Filename: {video.filename}")
-
-    # Allow various webm content types and octet-stream for browser compatibility
-    allowed_types = [
-        "video/mp4",
-        "video/webm",
-        "video/quicktime",
-        "video/x-matroska",
-        "application/octet-stream",  # Some browsers send this for webm
-        "video/webm;codecs=vp9",      # WebM with VP9 codec
-        "video/webm;codecs=vp8",      # WebM with VP8 codec
-    ]
-
-    # Check if content type starts with video/webm (to handle codec variations)
-    if not (video.content_type in allowed_types or
-            video.content_type.startswith("video/webm") or
-            (video.content_type == "application/octet-stream" and video.filename.endswith(".webm"))):
+    logger.debug(
+        "Received video upload %s with content_type %s",
+        video.filename,
+        video.content_type,
+    )
+
+    if not _is_allowed_video_type(video.content_type or ""):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"File type {video.content_type} not allowed. Use mp4, webm, or mov.",
         )
 
     # Verify proctoring session exists and belongs to user
-    session = await Collections.proctoring_sessions().find_one({
-        "session_id": session_id,
-        "user_id": current_user["user_id"],
-    })
+    session = await Collections.proctoring_sessions().find_one(
+        {"session_id": session_id, "user_id": current_user["user_id"]},
+        projection={"_id": 1},
+    )
 
     if not session:
         raise HTTPException(
@@ -258,6 +340,8 @@ async def upload_proctoring_video(
             detail="Proctoring session not found",
         )
 
+    now, now_ms = utc_now()
+
     # Generate video ID
     video_id = str(ObjectId())
 
@@ -268,9 +352,9 @@ async def upload_proctoring_video(
     # Save file temporarily
     file_path = os.path.join(UPLOAD_DIR, f"{video_id}_{video.filename}")
 
-    async with aiofiles.open(file_path, "wb") as f:
-        content = await video.read()
-        await f.write(content)
+    # Stream to disk in chunks so large recordings are never fully buffered.
+    # The whole copy runs in one worker thread rather than hopping per chunk.
+    file_size = await asyncio.to_thread(save_upload, video.file, file_path, video.size)
 
     # Create video document with correct content type
     video_doc = {
@@ -283,7 +367,7 @@ async def upload_proctoring_video(
         "filename": video.filename,
         "file_path": file_path,
         "content_type": "video/webm" if video.filename.endswith(".webm") else video.content_type,
-        "uploaded_at": datetime.utcnow(),
+        "uploaded_at": now,
         "uploaded_by": current_user["user_id"],  # Track who uploaded
     }
 
@@ -304,30 +388,26 @@ async def upload_proctoring_video(
     )
 
     # Log event
-    event_id = str(ObjectId())
+    event_id = new_hex_id()
     event_doc = {
         "_id": event_id,
         "user_id": current_user["user_id"],
         "session_id": session_id,
         "task_id": task_id,
         "event_type": "proctoring_video_uploaded",
-        "timestamp": datetime.utcnow(),
+        "timestamp": now,
         "properties": {
             "video_id": video_id,
-            "file_size": len(content),
+            "file_size": file_size,
         },
         "forwarded_to_amplitude": False,
         "processed_for_ml": False,
     }
 
-    await Collections.events().insert_one(event_doc)
-    background_tasks.add_task(
-        forward_to_amplitude,
-        event_id=event_id,
-        user_id=current_user["user_id"],
-        event_type="proctoring_video_uploaded",
-        timestamp=int(event_doc["timestamp"].timestamp() * 1000),
-        properties={
+    event_writer.submit(
+        event_doc,
+        timestamp_ms=now_ms,
+        amplitude_properties={
             "session_id": session_id,
             "task_id": task_id,
             "video_id": video_id,
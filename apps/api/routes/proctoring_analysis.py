@@ -3,10 +3,16 @@ Proctoring Analysis API Routes
 Phase 2: API endpoints for behavioral analysis of interview videos
 """
 
+import asyncio
+import logging
+from functools import lru_cache
 from fastapi import APIRouter, HTTPException, status, Depends, BackgroundTasks
+from fastapi.responses import ORJSONResponse
 from typing import Optional, List
 from datetime import datetime, timezone
 from bson import ObjectId
+from pydantic import TypeAdapter
+from pymongo.errors import DuplicateKeyError
 
 from middleware.auth import get_current_user
 from db.collections import Collections
@@ -14,17 +20,64 @@ from services.twelvelabs_behavior import (
     TwelveLabsBehaviorAnalyzer,
     analyze_video_background
 )
-from services.amplitude import forward_to_amplitude
+from services.amplitude import enqueue_amplitude_event
+from utils.behavioral_helpers import BehavioralAnalysisHelper
+from utils.timeutils import utc_now
 from models.behavioral_analysis import (
     AnalyzeBehaviorRequest,
     AnalyzeBehaviorResponse,
+    BehavioralAnalysis,
     BehavioralAnalysisResult,
+    BehavioralMetrics,
     BehaviorType,
-    SeverityLevel
+    SeverityLevel,
+    SuspiciousSegment
 )
 
 router = APIRouter(prefix="/proctoring", tags=["proctoring-analysis"])
 
+logger = logging.getLogger("proctoring")
+
+
+@lru_cache
+def _get_analyzer() -> TwelveLabsBehaviorAnalyzer:
+    """Shared analyzer; it only holds settings and config, so one per process is enough."""
+    return TwelveLabsBehaviorAnalyzer()
+
+
+@lru_cache
+def _get_helper() -> BehavioralAnalysisHelper:
+    return BehavioralAnalysisHelper()
+
+
+# Built once; validates a whole list of segments in a single pydantic-core call
+_SEGMENTS_ADAPTER = TypeAdapter(List[SuspiciousSegment])
+_ANALYSES_ADAPTER = TypeAdapter(List[BehavioralAnalysis])
+
+
+async def _store_report(session_id: str, user_id: str, report_data: dict):
+    """Persist an on-the-fly report; keeps the first one if requests race.
+
+    proctoring_reports.session_id is unique, so of two racing upserts one
+    inserts and the other fails with DuplicateKeyError.
+    """
+    try:
+        await Collections.db().proctoring_reports.update_one(
+            {"session_id": session_id},
+            {"$setOnInsert": {
+                "session_id": session_id,
+                "user_id": user_id,
+                "report": report_data,
+                "created_at": datetime.now(timezone.utc)
+            }},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        # A concurrent request stored its report first
+        pass
+    except Exception:
+        logger.exception("Failed to store proctoring report for session %s", session_id)
+
 
 @router.post("/{session_id}/analyze-video", response_model=AnalyzeBehaviorResponse)
 async def analyze_proctoring_video(
@@ -46,12 +99,25 @@ async def analyze_proctoring_video(
     Returns:
         AnalyzeBehaviorResponse with status and analysis_id
     """
-    # Verify session exists and belongs to user
-    session = await Collections.proctoring_sessions().find_one({
-        "session_id": session_id,
-        "user_id": current_user["user_id"]
-    })
+    # Session and video lookups are independent, so fetch them concurrently
+    session, video = await asyncio.gather(
+        Collections.proctoring_sessions().find_one({
+            "session_id": session_id,
+            "user_id": current_user["user_id"]
+        }, projection={"_id": 1}),
+        Collections.videos().find_one(
+            {"_id": request.video_id},
+            # overall_integrity_score is always stored with an analysis, so this
+            # one scalar is enough to tell whether an analysis already exists
+            projection={
+                "status": 1,
+                "twelvelabs_video_id": 1,
+                "behavioral_analysis.overall_integrity_score": 1
+            }
+        )
+    )
 
+    # Verify session exists and belongs to user
     if not session:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -59,7 +125,6 @@ async def analyze_proctoring_video(
         )
 
     # Verify video exists and is ready
-    video = await Collections.videos().find_one({"_id": request.video_id})
     if not video:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -90,14 +155,30 @@ async def analyze_proctoring_video(
 
     # Create analysis record
     analysis_id = str(ObjectId())
-
-    # Mark video as being analyzed
-    await Collections.videos().update_one(
-        {"_id": request.video_id},
-        {"$set": {
-            "behavioral_analysis_status": "in_progress",
-            "behavioral_analysis_started_at": datetime.now(timezone.utc)
-        }}
+    event_id = str(ObjectId())
+    now, now_ms = utc_now()
+
+    # Mark video as being analyzed and track the event in one round trip
+    await asyncio.gather(
+        Collections.videos().update_one(
+            {"_id": request.video_id},
+            {"$set": {
+                "behavioral_analysis_status": "in_progress",
+                "behavioral_analysis_started_at": now
+            }}
+        ),
+        Collections.events().insert_one({
+            "_id": event_id,
+            "user_id": current_user["user_id"],
+            "session_id": session_id,
+            "event_type": "behavioral_analysis_started",
+            "timestamp": now,
+            "properties": {
+                "video_id": request.video_id,
+                "analysis_id": analysis_id,
+                "force_reanalysis": request.force_reanalysis
+            }
+        })
     )
 
     # Trigger background analysis
@@ -110,26 +191,11 @@ async def analyze_proctoring_video(
     )
 
     # Track event in Amplitude
-    event_id = str(ObjectId())
-    await Collections.events().insert_one({
-        "_id": event_id,
-        "user_id": current_user["user_id"],
-        "session_id": session_id,
-        "event_type": "behavioral_analysis_started",
-        "timestamp": datetime.now(timezone.utc),
-        "properties": {
-            "video_id": request.video_id,
-            "analysis_id": analysis_id,
-            "force_reanalysis": request.force_reanalysis
-        }
-    })
-
-    background_tasks.add_task(
-        forward_to_amplitude,
+    enqueue_amplitude_event(
         event_id=event_id,
         user_id=current_user["user_id"],
         event_type="behavioral_analysis_started",
-        timestamp=int(datetime.now(timezone.utc).timestamp() * 1000),
+        timestamp=now_ms,
         properties={
             "session_id": session_id,
             "video_id": request.video_id,
@@ -164,7 +230,7 @@ async def get_behavioral_analysis(
     # Get session
     session = await Collections.proctoring_sessions().find_one({
         "session_id": session_id
-    })
+    }, projection={"user_id": 1})
 
     if not session:
         raise HTTPException(
@@ -183,7 +249,7 @@ async def get_behavioral_analysis(
     # Get associated video with analysis
     video = await Collections.videos().find_one({
         "session_id": session_id
-    })
+    }, projection={"behavioral_analysis": 1, "behavioral_analysis_status": 1})
 
     if not video:
         return BehavioralAnalysisResult(
@@ -212,8 +278,6 @@ async def get_behavioral_analysis(
     analysis = video["behavioral_analysis"]
 
     # Convert to response model
-    from models.behavioral_analysis import SuspiciousSegment, BehavioralMetrics
-
     suspicious_segments = [
         SuspiciousSegment(**segment) for segment in analysis.get("suspicious_segments", [])
     ]
@@ -232,7 +296,7 @@ async def get_behavioral_analysis(
     )
 
 
-@router.get("/{session_id}/behavioral-highlights")
+@router.get("/{session_id}/behavioral-highlights", response_class=ORJSONResponse)
 async def get_behavioral_highlights(
     session_id: str,
     behavior_type: Optional[BehaviorType] = None,
@@ -256,7 +320,7 @@ async def get_behavioral_highlights(
     # Verify session access
     session = await Collections.proctoring_sessions().find_one({
         "session_id": session_id
-    })
+    }, projection={"user_id": 1})
 
     if not session:
         raise HTTPException(
@@ -272,64 +336,73 @@ async def get_behavioral_highlights(
             detail="Access denied"
         )
 
-    # Get video with analysis
-    video = await Collections.videos().find_one({
-        "session_id": session_id,
-        "behavioral_analysis": {"$exists": True}
-    })
-
-    if not video or not video.get("behavioral_analysis"):
-        return {"highlights": [], "message": "No analysis available"}
-
-    # Extract segments
-    analysis = video["behavioral_analysis"]
-    segments = analysis.get("suspicious_segments", [])
-
-    # Apply filters
-    filtered_segments = segments
+    # Filter, sort and limit the segments inside MongoDB so only the
+    # requested highlights come back over the wire
+    segment_conditions = []
     if behavior_type:
-        filtered_segments = [
-            s for s in filtered_segments
-            if s.get("behavior_type") == behavior_type.value
-        ]
+        segment_conditions.append({"$eq": ["$$seg.behavior_type", behavior_type.value]})
     if severity:
-        filtered_segments = [
-            s for s in filtered_segments
-            if s.get("severity") == severity.value
-        ]
+        segment_conditions.append({"$eq": ["$$seg.severity", severity.value]})
 
-    # Sort by confidence and limit
-    filtered_segments.sort(key=lambda x: x.get("confidence", 0), reverse=True)
-    filtered_segments = filtered_segments[:limit]
+    all_segments = {"$ifNull": ["$behavioral_analysis.suspicious_segments", []]}
+    results = await Collections.videos().aggregate([
+        {"$match": {
+            "session_id": session_id,
+            "behavioral_analysis": {"$exists": True, "$ne": None}
+        }},
+        {"$limit": 1},
+        {"$project": {
+            "_id": 0,
+            "total_count": {"$size": all_segments},
+            "segments": {"$slice": [
+                {"$sortArray": {
+                    "input": {"$filter": {
+                        "input": all_segments,
+                        "as": "seg",
+                        "cond": {"$and": segment_conditions} if segment_conditions else True
+                    }},
+                    "sortBy": {"confidence": -1}
+                }},
+                max(limit, 0)
+            ]}
+        }}
+    ]).to_list(length=1)
+
+    if not results:
+        return {"highlights": [], "message": "No analysis available"}
+
+    top_segments = _SEGMENTS_ADAPTER.validate_python(results[0]["segments"])
 
     # Format as highlights
-    from utils.behavioral_helpers import BehavioralAnalysisHelper
-    helper = BehavioralAnalysisHelper()
-
-    highlights = []
-    for segment in filtered_segments:
-        highlights.append({
-            "segment_id": segment.get("segment_id"),
-            "timestamp_start": helper.format_time(segment.get("start_time", 0)),
-            "timestamp_end": helper.format_time(segment.get("end_time", 0)),
-            "behavior": segment.get("behavior_type"),
-            "severity": segment.get("severity"),
-            "confidence": f"{segment.get('confidence', 0) * 100:.0f}%",
-            "description": segment.get("description"),
-            "thumbnail_url": segment.get("thumbnail_url")
-        })
+    format_time = _get_helper().format_time
+
+    highlights = [
+        {
+            "segment_id": segment.segment_id,
+            "timestamp_start": format_time(segment.start_time),
+            "timestamp_end": format_time(segment.end_time),
+            "behavior": segment.behavior_type.value,
+            "severity": segment.severity.value,
+            # round() matches the previous :.0f formatting without the float formatter
+            "confidence": f"{round(segment.confidence * 100)}%",
+            "description": segment.description,
+            "thumbnail_url": segment.thumbnail_url
+        }
+        for segment in top_segments
+    ]
 
     return {
         "session_id": session_id,
         "highlights": highlights,
-        "total_count": len(segments),
+        "total_count": results[0]["total_count"],
         "filtered_count": len(highlights)
     }
 
 
-@router.get("/{session_id}/proctoring-report")
+@router.get("/{session_id}/proctoring-report", response_class=ORJSONResponse)
 async def get_proctoring_report(
     session_id: str,
+    background_tasks: BackgroundTasks,
     current_user: dict = Depends(get_current_user)
 ):
     """
@@ -337,6 +410,7 @@ async def get_proctoring_report(
 
     Args:
         session_id: Proctoring session ID
+        background_tasks: FastAPI background tasks
         current_user: Authenticated user
 
     Returns:
@@ -348,7 +422,7 @@ async def get_proctoring_report(
         session = await Collections.proctoring_sessions().find_one({
             "session_id": session_id,
             "user_id": current_user["user_id"]
-        })
+        }, projection={"user_id": 1})
         if not session:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -358,7 +432,7 @@ async def get_proctoring_report(
         # Recruiters can see any report
         session = await Collections.proctoring_sessions().find_one({
             "session_id": session_id
-        })
+        }, projection={"user_id": 1})
         if not session:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -368,19 +442,18 @@ async def get_proctoring_report(
     # Get proctoring report from database
     report = await Collections.db().proctoring_reports.find_one({
         "session_id": session_id
-    })
+    }, projection={"report": 1})
 
     if not report:
         # Try to generate report if analysis exists
         video = await Collections.videos().find_one({
             "session_id": session_id,
             "behavioral_analysis": {"$exists": True}
-        })
+        }, projection={"behavioral_analysis": 1, "twelvelabs_video_id": 1})
 
         if video and video.get("behavioral_analysis"):
             # Generate report on the fly
-            from models.behavioral_analysis import BehavioralAnalysis
-            analyzer = TwelveLabsBehaviorAnalyzer()
+            analyzer = _get_analyzer()
 
             analysis = BehavioralAnalysis(**video["behavioral_analysis"])
             report_data = await analyzer.generate_proctoring_report(
@@ -388,22 +461,22 @@ async def get_proctoring_report(
                 analysis
             )
 
-            # Store for future use
-            await Collections.db().proctoring_reports.insert_one({
-                "session_id": session_id,
-                "user_id": session["user_id"],
-                "report": report_data,
-                "created_at": datetime.now(timezone.utc)
-            })
+            # Store for future use once the response has been sent
+            background_tasks.add_task(
+                _store_report,
+                session_id,
+                session["user_id"],
+                report_data
+            )
 
-            return report_data
+            return ORJSONResponse(report_data)
         else:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="No proctoring report available for this session"
             )
 
-    return report["report"]
+    return ORJSONResponse(report["report"])
 
 
 @router.post("/compare-sessions")
@@ -437,7 +510,7 @@ async def compare_user_sessions(
         "session_id": current_session_id,
         "user_id": user_id,
         "behavioral_analysis": {"$exists": True}
-    })
+    }, projection={"behavioral_analysis": 1})
 
     if not current_video or not current_video.get("behavioral_analysis"):
         raise HTTPException(
@@ -445,30 +518,40 @@ async def compare_user_sessions(
             detail="Current session analysis not found"
         )
 
-    # Get previous session analyses
-    previous_analyses = []
-    for session_id in previous_session_ids:
-        video = await Collections.videos().find_one({
-            "session_id": session_id,
-            "user_id": user_id,
-            "behavioral_analysis": {"$exists": True}
-        })
-        if video and video.get("behavioral_analysis"):
-            from models.behavioral_analysis import BehavioralAnalysis
-            analysis = BehavioralAnalysis(**video["behavioral_analysis"])
-            previous_analyses.append(analysis)
+    # Get previous session analyses in one round trip, keeping the caller's order
+    previous_videos = await Collections.videos().find({
+        "session_id": {"$in": previous_session_ids},
+        "user_id": user_id,
+        "behavioral_analysis": {"$exists": True}
+    }, projection={"session_id": 1, "behavioral_analysis": 1}).to_list(length=len(previous_session_ids))
 
-    if not previous_analyses:
+    analysis_by_session = {
+        video["session_id"]: video["behavioral_analysis"]
+        for video in previous_videos
+        if video.get("behavioral_analysis")
+    }
+    previous_raw = [
+        analysis_by_session[session_id]
+        for session_id in dict.fromkeys(previous_session_ids)
+        if session_id in analysis_by_session
+    ]
+
+    if not previous_raw:
         return {
             "error": "No previous sessions with analysis found",
             "sessions_found": 0
         }
 
+    # Validating full analyses (with all their segments) is CPU-bound, so do
+    # the whole batch in one call on a worker thread
+    current_analysis, *previous_analyses = await asyncio.to_thread(
+        _ANALYSES_ADAPTER.validate_python,
+        [current_video["behavioral_analysis"], *previous_raw]
+    )
+
     # Perform comparison
-    from models.behavioral_analysis import BehavioralAnalysis
-    analyzer = TwelveLabsBehaviorAnalyzer()
+    analyzer = _get_analyzer()
 
-    current_analysis = BehavioralAnalysis(**current_video["behavioral_analysis"])
     comparison = await analyzer.compare_sessions(
         user_id=user_id,
         current_analysis=current_analysis,
@@ -478,7 +561,7 @@ async def compare_user_sessions(
     return comparison
 
 
-@router.get("/analysis-status/{video_id}")
+@router.get("/analysis-status/{video_id}", response_class=ORJSONResponse)
 async def get_analysis_status(
     video_id: str,
     current_user: dict = Depends(get_current_user)
@@ -496,6 +579,15 @@ async def get_analysis_status(
     # Get video
     video = await Collections.videos().find_one({
         "_id": video_id
+    }, projection={
+        "user_id": 1,
+        "behavioral_analysis.analyzed_at": 1,
+        "behavioral_analysis.overall_integrity_score": 1,
+        "behavioral_analysis.flagged_for_review": 1,
+        "behavioral_analysis.anomaly_summary": 1,
+        "behavioral_analysis_status": 1,
+        "behavioral_analysis_started_at": 1,
+        "behavioral_analysis_error": 1
     })
 
     if not video:
@@ -515,34 +607,34 @@ async def get_analysis_status(
     # Determine status
     if video.get("behavioral_analysis"):
         analysis = video["behavioral_analysis"]
-        return {
+        return ORJSONResponse({
             "video_id": video_id,
             "status": "completed",
             "analyzed_at": analysis.get("analyzed_at"),
             "integrity_score": analysis.get("overall_integrity_score"),
             "flagged_for_review": analysis.get("flagged_for_review"),
             "summary": analysis.get("anomaly_summary")
-        }
+        })
     elif video.get("behavioral_analysis_status") == "in_progress":
-        return {
+        return ORJSONResponse({
             "video_id": video_id,
             "status": "in_progress",
             "started_at": video.get("behavioral_analysis_started_at"),
             "message": "Analysis is currently running"
-        }
+        })
     elif video.get("behavioral_analysis_error"):
-        return {
+        return ORJSONResponse({
             "video_id": video_id,
             "status": "failed",
             "error": video.get("behavioral_analysis_error"),
             "message": "Analysis failed. Please try again."
-        }
+        })
     else:
-        return {
+        return ORJSONResponse({
             "video_id": video_id,
             "status": "not_started",
             "message": "Analysis has not been triggered yet"
-        }
+        })
 
 
 @router.delete("/{session_id}/behavioral-analysis")
@@ -560,46 +652,46 @@ async def delete_behavioral_analysis(
     Returns:
         Deletion confirmation
     """
-    # Only allow user to delete their own analysis
-    session = await Collections.proctoring_sessions().find_one({
-        "session_id": session_id,
-        "user_id": current_user["user_id"]
-    })
+    # Only allow user to delete their own analysis. Every write is scoped by
+    # user_id, so the three are independent and can run concurrently; the
+    # session update's match count doubles as the ownership check.
+    user_id = current_user["user_id"]
+
+    result, _, session_result = await asyncio.gather(
+        # Remove analysis from video
+        Collections.videos().update_one(
+            {"session_id": session_id, "user_id": user_id},
+            {"$unset": {
+                "behavioral_analysis": "",
+                "behavioral_analysis_status": "",
+                "behavioral_analysis_started_at": "",
+                "behavioral_analysis_completed": "",
+                "behavioral_analysis_error": ""
+            }}
+        ),
+        # Remove proctoring report
+        Collections.db().proctoring_reports.delete_one({
+            "session_id": session_id,
+            "user_id": user_id
+        }),
+        # Update proctoring session
+        Collections.proctoring_sessions().update_one(
+            {"session_id": session_id, "user_id": user_id},
+            {"$unset": {
+                "video_analyzed": "",
+                "integrity_score": "",
+                "flagged_for_review": "",
+                "behavioral_analysis_id": ""
+            }}
+        )
+    )
 
-    if not session:
+    if session_result.matched_count == 0:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Cannot delete analysis for this session"
         )
 
-    # Remove analysis from video
-    result = await Collections.videos().update_one(
-        {"session_id": session_id},
-        {"$unset": {
-            "behavioral_analysis": "",
-            "behavioral_analysis_status": "",
-            "behavioral_analysis_started_at": "",
-            "behavioral_analysis_completed": "",
-            "behavioral_analysis_error": ""
-        }}
-    )
-
-    # Remove proctoring report
-    await Collections.db().proctoring_reports.delete_one({
-        "session_id": session_id
-    })
-
-    # Update proctoring session
-    await Collections.proctoring_sessions().update_one(
-        {"session_id": session_id},
-        {"$unset": {
-            "video_analyzed": "",
-            "integrity_score": "",
-            "flagged_for_review": "",
-            "behavioral_analysis_id": ""
-        }}
-    )
-
     return {
         "success": True,
         "message": f"Behavioral analysis deleted for session {session_id}",
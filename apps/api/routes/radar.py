@@ -8,21 +8,45 @@ Provides endpoints for:
 - Contextual hints based on code history (Feature 1)
 """
 
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import ORJSONResponse, Response
 from pydantic import BaseModel
 from typing import Optional
 from datetime import datetime
 from bson import ObjectId
+from pymongo import ReturnDocument
 
 from middleware.auth import get_current_user
 from db.collections import Collections
-from services.ai_worker import acknowledge_intervention, track_intervention_effectiveness
-from services.backboard import BackboardService
-from services.amplitude import forward_to_amplitude
+from services.ai_worker import (
+    acknowledge_intervention,
+    track_intervention_effectiveness,
+    radar_profile_cache,
+    active_session_cache,
+    intervention_cache,
+)
+from services.backboard import BackboardService, CONTEXTUAL_HINT_CODE_SNAPSHOTS
+from services.event_writer import event_writer
 from services.user_error_profile import compute_error_profile, get_error_profile_summary
+from utils.cache import AsyncTTLCache
+from utils.timeutils import utc_now
 
 router = APIRouter()
 
+# Most intervention polls return this, so it is encoded once up front
+_NO_INTERVENTION = b'{"intervention":null}'
+
+# Intervention fields copied onto hint analytics events
+_INTERVENTION_EVENT_FIELDS = {
+    "task_id": 1,
+    "hint_category": 1,
+    "intervention_type": 1,
+    "trigger_reason": 1,
+    "hint_style": 1,
+    "personalization_badge": 1,
+}
+
 
 class RadarDimension(BaseModel):
     score: float
@@ -62,6 +86,70 @@ class EffectivenessRequest(BaseModel):
     issue_resolved: bool
 
 
+def _intervention_from_ctx(ai_context: dict, session_id: str) -> Optional[Intervention]:
+    """Build the pending intervention from a session's ai_context, if stuck."""
+    if not ai_context.get("is_stuck"):
+        return None
+    # Fields come straight from our own ai_context writes, so skip validation
+    return Intervention.model_construct(
+        hint=ai_context.get("last_hint"),
+        hint_category=ai_context.get("hint_category"),
+        intervention_type=ai_context.get("intervention_type"),
+        session_id=session_id,
+        triggered_at=ai_context.get("stuck_since"),
+    )
+
+
+async def _load_active_session(user_id: str) -> Optional[dict]:
+    """Fetch the user's latest unended session and its hint state."""
+    # Pinned to active_sessions_idx so the planner can't fall back to the
+    # plain user_id index and sort a heavy user's sessions in memory
+    sessions = await (
+        Collections.sessions()
+        .find(
+            {"user_id": user_id, "ended_at": None},
+            projection={"session_id": 1, "ai_context": 1},
+        )
+        .hint("active_sessions_idx")
+        .sort("started_at", -1)
+        .limit(1)
+        .to_list(1)
+    )
+    return sessions[0] if sessions else None
+
+
+async def _build_radar_response(user_id: str) -> RadarResponse:
+    """Assemble a user's radar profile and pending intervention."""
+    # The profile and the active session (for intervention status) are cached
+    # separately since the session's hint state churns much faster; on a miss
+    # the two lookups run concurrently
+    user, active_session = await asyncio.gather(
+        radar_profile_cache.get(
+            user_id,
+            lambda: Collections.users().find_one(
+                {"_id": user_id},
+                projection={"radar_profile": 1, "radar_summary": 1},
+            ),
+        ),
+        active_session_cache.get(user_id, lambda: _load_active_session(user_id)),
+    )
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    intervention = None
+    if active_session:
+        intervention = _intervention_from_ctx(
+            active_session.get("ai_context", {}), active_session["session_id"]
+        )
+
+    return RadarResponse.model_construct(
+        user_id=user_id,
+        radar_profile=user.get("radar_profile"),
+        intervention=intervention,
+        radar_summary=user.get("radar_summary"),
+    )
+
+
 @router.get("/{user_id}", response_model=RadarResponse)
 async def get_radar_profile(
     user_id: str,
@@ -76,34 +164,7 @@ async def get_radar_profile(
             status_code=403, detail="Not authorized to view this profile"
         )
 
-    user = await Collections.users().find_one({"_id": user_id})
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
-    # Get active session intervention status
-    active_session = await Collections.sessions().find_one(
-        {"user_id": user_id, "ended_at": None},
-        sort=[("started_at", -1)],
-    )
-
-    intervention = None
-    if active_session:
-        ai_context = active_session.get("ai_context", {})
-        if ai_context.get("is_stuck"):
-            intervention = Intervention(
-                hint=ai_context.get("last_hint"),
-                hint_category=ai_context.get("hint_category"),
-                intervention_type=ai_context.get("intervention_type"),
-                session_id=active_session["session_id"],
-                triggered_at=ai_context.get("stuck_since"),
-            )
-
-    return RadarResponse(
-        user_id=user_id,
-        radar_profile=user.get("radar_profile"),
-        intervention=intervention,
-        radar_summary=user.get("radar_summary"),
-    )
+    return await _build_radar_response(user_id)
 
 
 @router.get("/me/profile", response_model=RadarResponse)
@@ -113,36 +174,7 @@ async def get_my_radar_profile(
     """
     Get current user's Engineering DNA radar profile.
     """
-    user_id = current_user["user_id"]
-    user = await Collections.users().find_one({"_id": user_id})
-
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
-    # Get active session intervention status
-    active_session = await Collections.sessions().find_one(
-        {"user_id": user_id, "ended_at": None},
-        sort=[("started_at", -1)],
-    )
-
-    intervention = None
-    if active_session:
-        ai_context = active_session.get("ai_context", {})
-        if ai_context.get("is_stuck"):
-            intervention = Intervention(
-                hint=ai_context.get("last_hint"),
-                hint_category=ai_context.get("hint_category"),
-                intervention_type=ai_context.get("intervention_type"),
-                session_id=active_session["session_id"],
-                triggered_at=ai_context.get("stuck_since"),
-            )
-
-    return RadarResponse(
-        user_id=user_id,
-        radar_profile=user.get("radar_profile"),
-        intervention=intervention,
-        radar_summary=user.get("radar_summary"),
-    )
+    return await _build_radar_response(current_user["user_id"])
 
 
 # =========================================================================
@@ -176,7 +208,7 @@ async def get_my_error_profile(
     # Get human-readable summary
     summary = await get_error_profile_summary(user_id)
 
-    return ErrorProfileResponse(
+    return ErrorProfileResponse.model_construct(
         dominant_category=profile.get("dominant_category", "logic"),
         category_distribution=profile.get("category_distribution", {}),
         total_errors=profile.get("total_errors", 0),
@@ -190,7 +222,6 @@ async def get_my_error_profile(
 @router.post("/intervention/acknowledge")
 async def acknowledge_hint(
     request: AcknowledgeRequest,
-    background_tasks: BackgroundTasks,
     current_user: dict = Depends(get_current_user),
 ):
     """
@@ -199,24 +230,21 @@ async def acknowledge_hint(
     """
     user_id = current_user["user_id"]
 
-    # Get the intervention being acknowledged for analytics
-    intervention = await Collections.interventions().find_one(
-        {"session_id": request.session_id, "user_id": user_id, "acknowledged": False},
-        sort=[("triggered_at", -1)],
+    # Acknowledge the intervention; the acknowledged record comes back for analytics
+    intervention = await acknowledge_intervention(
+        request.session_id, user_id, projection=_INTERVENTION_EVENT_FIELDS
     )
 
-    # Acknowledge the intervention
-    await acknowledge_intervention(request.session_id, user_id)
-
     # Track hint_acknowledged event to Amplitude
     event_id = str(ObjectId())
+    now, now_ms = utc_now()
     event_doc = {
         "_id": event_id,
         "user_id": user_id,
         "session_id": request.session_id,
         "task_id": intervention.get("task_id") if intervention else None,
         "event_type": "hint_acknowledged",
-        "timestamp": datetime.utcnow(),
+        "timestamp": now,
         "properties": {
             "hint_category": intervention.get("hint_category") if intervention else None,
             "intervention_type": intervention.get("intervention_type") if intervention else None,
@@ -226,16 +254,11 @@ async def acknowledge_hint(
         },
         "forwarded_to_amplitude": False,
     }
-    await Collections.events().insert_one(event_doc)
-
-    # Forward to Amplitude in background
-    background_tasks.add_task(
-        forward_to_amplitude,
-        event_id=event_id,
-        user_id=user_id,
-        event_type="hint_acknowledged",
-        timestamp=int(event_doc["timestamp"].timestamp() * 1000),
-        properties={
+    # Stored in the next batched insert, then forwarded to Amplitude
+    event_writer.submit(
+        event_doc,
+        timestamp_ms=now_ms,
+        amplitude_properties={
             "session_id": request.session_id,
             "task_id": intervention.get("task_id") if intervention else None,
             "hint_category": intervention.get("hint_category") if intervention else None,
@@ -250,7 +273,6 @@ async def acknowledge_hint(
 @router.post("/intervention/effectiveness")
 async def report_intervention_effectiveness(
     request: EffectivenessRequest,
-    background_tasks: BackgroundTasks,
     current_user: dict = Depends(get_current_user),
 ):
     """
@@ -260,29 +282,26 @@ async def report_intervention_effectiveness(
     """
     user_id = current_user["user_id"]
 
-    # Get the most recent acknowledged intervention for this session
-    intervention = await Collections.interventions().find_one(
-        {"session_id": request.session_id, "user_id": user_id, "acknowledged": True},
-        sort=[("triggered_at", -1)],
-    )
-
-    # Track effectiveness
-    await track_intervention_effectiveness(
+    # Track effectiveness on the most recent acknowledged intervention for this
+    # session; the record comes back for analytics
+    intervention = await track_intervention_effectiveness(
         session_id=request.session_id,
         user_id=user_id,
         code_changed=request.code_changed,
         issue_resolved=request.issue_resolved,
+        projection=_INTERVENTION_EVENT_FIELDS,
     )
 
     # Track hint_effectiveness event to Amplitude
     event_id = str(ObjectId())
+    now, now_ms = utc_now()
     event_doc = {
         "_id": event_id,
         "user_id": user_id,
         "session_id": request.session_id,
         "task_id": intervention.get("task_id") if intervention else None,
         "event_type": "hint_effectiveness_reported",
-        "timestamp": datetime.utcnow(),
+        "timestamp": now,
         "properties": {
             "code_changed": request.code_changed,
             "issue_resolved": request.issue_resolved,
@@ -293,16 +312,11 @@ async def report_intervention_effectiveness(
         },
         "forwarded_to_amplitude": False,
     }
-    await Collections.events().insert_one(event_doc)
-
-    # Forward to Amplitude in background
-    background_tasks.add_task(
-        forward_to_amplitude,
-        event_id=event_id,
-        user_id=user_id,
-        event_type="hint_effectiveness_reported",
-        timestamp=int(event_doc["timestamp"].timestamp() * 1000),
-        properties={
+    # Stored in the next batched insert, then forwarded to Amplitude
+    event_writer.submit(
+        event_doc,
+        timestamp_ms=now_ms,
+        amplitude_properties={
             "session_id": request.session_id,
             "code_changed": request.code_changed,
             "issue_resolved": request.issue_resolved,
@@ -322,18 +336,25 @@ async def report_intervention_effectiveness(
 @router.get("/session/{session_id}/intervention")
 async def get_session_intervention(
     session_id: str,
-    background_tasks: BackgroundTasks,
     current_user: dict = Depends(get_current_user),
 ):
     """
     Get the current intervention for a specific session.
     Tracks hint_displayed event when a hint is shown for the first time.
     """
-    session = await Collections.sessions().find_one({"session_id": session_id})
+    # Clients poll this endpoint and most polls find no hint, so the session's
+    # ai_context is served from a cache that every ai_context write invalidates
+    session = await intervention_cache.get(
+        session_id,
+        lambda: Collections.sessions().find_one(
+            {"session_id": session_id},
+            projection={"user_id": 1, "task_id": 1, "ai_context": 1},
+        ),
+    )
 
     # Return empty intervention if session doesn't exist yet
     if not session:
-        return {"intervention": None}
+        return Response(content=_NO_INTERVENTION, media_type="application/json")
 
     if session.get("user_id") != current_user["user_id"]:
         raise HTTPException(
@@ -343,74 +364,93 @@ async def get_session_intervention(
     ai_context = session.get("ai_context", {})
 
     if not ai_context.get("is_stuck"):
-        return {"intervention": None}
+        return Response(content=_NO_INTERVENTION, media_type="application/json")
 
     user_id = current_user["user_id"]
 
-    # Track hint_displayed event (only once per intervention)
-    # Check if we already tracked display for this hint
-    hint_triggered_at = ai_context.get("stuck_since")
-    if hint_triggered_at and not ai_context.get("display_tracked"):
-        # Mark as tracked
-        await Collections.sessions().update_one(
-            {"session_id": session_id},
-            {"$set": {"ai_context.display_tracked": True}}
-        )
-
-        # Track hint_displayed event to Amplitude
-        event_id = str(ObjectId())
-        event_doc = {
-            "_id": event_id,
-            "user_id": user_id,
-            "session_id": session_id,
-            "task_id": session.get("task_id"),
-            "event_type": "hint_displayed",
-            "timestamp": datetime.utcnow(),
-            "properties": {
-                "hint_category": ai_context.get("hint_category"),
-                "intervention_type": ai_context.get("intervention_type"),
-                "trigger_reason": ai_context.get("trigger_reason"),
-                "hint_style": ai_context.get("hint_style"),
-                "personalization_badge": ai_context.get("personalization_badge"),
-            },
-            "forwarded_to_amplitude": False,
-        }
-        await Collections.events().insert_one(event_doc)
-
-        background_tasks.add_task(
-            forward_to_amplitude,
-            event_id=event_id,
-            user_id=user_id,
-            event_type="hint_displayed",
-            timestamp=int(event_doc["timestamp"].timestamp() * 1000),
-            properties={
-                "session_id": session_id,
-                "hint_category": ai_context.get("hint_category"),
-                "intervention_type": ai_context.get("intervention_type"),
-                "trigger_reason": ai_context.get("trigger_reason"),
-            },
-        )
+    # Read each ai_context field once; the event and the response share them
+    get = ai_context.get
+    hint_category = get("hint_category")
+    intervention_type = get("intervention_type")
+    trigger_reason = get("trigger_reason")
+    hint_style = get("hint_style")
+    personalization_badge = get("personalization_badge")
+    hint_triggered_at = get("stuck_since")
 
     # Get the full intervention record for behavior analysis
-    intervention_record = await Collections.interventions().find_one(
+    record_lookup = Collections.interventions().find_one(
         {"session_id": session_id, "user_id": user_id},
         sort=[("triggered_at", -1)],
+        projection={"behavior_analysis": 1},
     )
 
-    return {
+    # Track hint_displayed event (only once per intervention)
+    # Check if we already tracked display for this hint
+    if hint_triggered_at and not get("display_tracked"):
+        # Atomically claim the first display so concurrent polls can't both
+        # record it; the intervention record is read in the same round trip
+        claimed, intervention_record = await asyncio.gather(
+            Collections.sessions().find_one_and_update(
+                {
+                    "session_id": session_id,
+                    "ai_context.is_stuck": True,
+                    "ai_context.display_tracked": {"$ne": True},
+                },
+                {"$set": {"ai_context.display_tracked": True}},
+                projection={"_id": 1},
+            ),
+            record_lookup,
+        )
+        intervention_cache.invalidate(session_id)
+
+        if claimed:
+            # Track hint_displayed event to Amplitude
+            event_id = str(ObjectId())
+            now, now_ms = utc_now()
+            event_doc = {
+                "_id": event_id,
+                "user_id": user_id,
+                "session_id": session_id,
+                "task_id": session.get("task_id"),
+                "event_type": "hint_displayed",
+                "timestamp": now,
+                "properties": {
+                    "hint_category": hint_category,
+                    "intervention_type": intervention_type,
+                    "trigger_reason": trigger_reason,
+                    "hint_style": hint_style,
+                    "personalization_badge": personalization_badge,
+                },
+                "forwarded_to_amplitude": False,
+            }
+            # Stored in the next batched insert, then forwarded to Amplitude
+            event_writer.submit(
+                event_doc,
+                timestamp_ms=now_ms,
+                amplitude_properties={
+                    "session_id": session_id,
+                    "hint_category": hint_category,
+                    "intervention_type": intervention_type,
+                    "trigger_reason": trigger_reason,
+                },
+            )
+    else:
+        intervention_record = await record_lookup
+
+    return ORJSONResponse({
         "intervention": {
-            "hint": ai_context.get("last_hint"),
-            "hint_category": ai_context.get("hint_category"),
-            "intervention_type": ai_context.get("intervention_type"),
-            "triggered_at": ai_context.get("stuck_since"),
-            "analysis": ai_context.get("analysis"),
-            "models_used": ai_context.get("models_used", []),
-            "personalization_badge": ai_context.get("personalization_badge"),
-            "hint_style": ai_context.get("hint_style"),
-            "trigger_reason": ai_context.get("trigger_reason"),
+            "hint": get("last_hint"),
+            "hint_category": hint_category,
+            "intervention_type": intervention_type,
+            "triggered_at": hint_triggered_at,
+            "analysis": get("analysis"),
+            "models_used": get("models_used", []),
+            "personalization_badge": personalization_badge,
+            "hint_style": hint_style,
+            "trigger_reason": trigger_reason,
             "behavior_analysis": intervention_record.get("behavior_analysis") if intervention_record else None,
         }
-    }
+    })
 
 
 # =========================================================================
@@ -431,6 +471,62 @@ class ContextualHintResponse(BaseModel):
     hint_id: str
 
 
+# Most recent snapshots passed to the hint generator. Code runs already cap
+# code_history at 20; this bounds the read even for sessions that predate it.
+CONTEXTUAL_HINT_HISTORY_WINDOW = 20
+
+# The hint generator only looks at the code of the last few snapshots and at
+# every snapshot's error, so drop the code from older snapshots server-side
+_CONTEXTUAL_HINT_SESSION_FIELDS = {
+    "user_id": 1,
+    "code_history": {
+        "$let": {
+            "vars": {"history": {"$slice": [
+                {"$ifNull": ["$code_history", []]},
+                -CONTEXTUAL_HINT_HISTORY_WINDOW,
+            ]}},
+            "in": {
+                "$map": {
+                    "input": {"$range": [0, {"$size": "$$history"}]},
+                    "as": "i",
+                    "in": {
+                        "$let": {
+                            "vars": {"entry": {"$arrayElemAt": ["$$history", "$$i"]}},
+                            "in": {
+                                "$cond": [
+                                    {"$gte": [
+                                        "$$i",
+                                        {"$subtract": [
+                                            {"$size": "$$history"},
+                                            CONTEXTUAL_HINT_CODE_SNAPSHOTS,
+                                        ]},
+                                    ]},
+                                    "$$entry",
+                                    {"error": {"$getField": {"field": "error", "input": "$$entry"}}},
+                                ]
+                            },
+                        }
+                    },
+                }
+            },
+        }
+    },
+}
+
+# Task descriptions are seeded offline and never edited, so cache them for long
+_task_description_cache = AsyncTTLCache(maxsize=4096, ttl=3600.0)
+
+
+async def _get_task_description(task_id: str) -> dict | None:
+    """Fetch a task's description, served from the in-process cache."""
+    return await _task_description_cache.get(
+        task_id,
+        lambda: Collections.tasks().find_one(
+            {"task_id": task_id}, projection={"description": 1}
+        ),
+    )
+
+
 # =========================================================================
 # FRUSTRATION TRACKING - Real-time frustration level for hint unlocking
 # =========================================================================
@@ -441,6 +537,9 @@ FRUSTRATION_THRESHOLD = 0.5
 # How much each "!" keypress boosts frustration (for demo)
 DEMO_BOOST_AMOUNT = 0.15
 
+_RUN_EVENT_TYPES = frozenset({"test_cases_ran", "run_attempted"})
+_SCORED_EVENT_TYPES = ["error_emitted", "code_changed", *sorted(_RUN_EVENT_TYPES)]
+
 
 class FrustrationBoostRequest(BaseModel):
     session_id: str
@@ -455,6 +554,11 @@ class FrustrationStatusResponse(BaseModel):
     demo_boosts: int
 
 
+# The hint button polls frustration status, so serve repeat polls from a short
+# per-session cache; boosts invalidate it so they show up immediately
+_frustration_cache = AsyncTTLCache(maxsize=4096, ttl=1.0)
+
+
 @router.get("/session/{session_id}/frustration", response_model=FrustrationStatusResponse)
 async def get_frustration_status(
     session_id: str,
@@ -464,14 +568,22 @@ async def get_frustration_status(
     Get current frustration level for a session.
     Used to determine if "Need a Hint?" button should be unlocked.
     """
-    user_id = current_user["user_id"]
+    return await _frustration_cache.get(
+        session_id, lambda: _compute_frustration_status(session_id)
+    )
 
+
+async def _compute_frustration_status(session_id: str) -> FrustrationStatusResponse:
+    """Score a session from its demo boosts and recent behavioral events."""
     # Get session
-    session = await Collections.sessions().find_one({"session_id": session_id})
+    session = await Collections.sessions().find_one(
+        {"session_id": session_id},
+        projection={"started_at": 1, "frustration_context.demo_boosts": 1},
+    )
 
     if not session:
         # No session yet - return baseline
-        return FrustrationStatusResponse(
+        return FrustrationStatusResponse.model_construct(
             frustration_score=0.0,
             threshold=FRUSTRATION_THRESHOLD,
             hint_unlocked=False,
@@ -483,22 +595,43 @@ async def get_frustration_status(
     demo_boosts = session.get("frustration_context", {}).get("demo_boosts", 0)
     demo_boost_score = min(0.5, demo_boosts * DEMO_BOOST_AMOUNT)  # Cap at 0.5 from boosts
 
-    # Fetch recent events for natural frustration calculation
+    # Fetch recent scored events for natural frustration calculation; other
+    # event types (hint displays, boosts, chat) never affect the score
     recent_events = (
         await Collections.events()
-        .find({"session_id": session_id})
+        .find(
+            {"session_id": session_id, "event_type": {"$in": _SCORED_EVENT_TYPES}},
+            # Scoring only reads the type and the pass/fail properties
+            projection={
+                "_id": 0,
+                "event_type": 1,
+                "properties.passed": 1,
+                "properties.tests_passed": 1,
+            },
+        )
         .sort("timestamp", -1)
         .limit(30)
         .to_list(30)
     )
 
+    # No scored events can still mean the user is stuck without touching code
+    # (only hints, chat or boosts so far); only a session with no events at
+    # all is brand new
+    has_unscored_events = False
+    if not recent_events:
+        has_unscored_events = await Collections.events().find_one(
+            {"session_id": session_id}, projection={"_id": 1}
+        ) is not None
+
     # Calculate natural frustration from behavior
-    natural_frustration = calculate_natural_frustration(recent_events, session)
+    natural_frustration = calculate_natural_frustration(
+        recent_events, session, has_unscored_events=has_unscored_events
+    )
 
     # Combine natural + demo boost
     total_frustration = min(1.0, natural_frustration["score"] + demo_boost_score)
 
-    return FrustrationStatusResponse(
+    return FrustrationStatusResponse.model_construct(
         frustration_score=round(total_frustration, 2),
         threshold=FRUSTRATION_THRESHOLD,
         hint_unlocked=total_frustration >= FRUSTRATION_THRESHOLD,
@@ -514,7 +647,6 @@ async def get_frustration_status(
 @router.post("/session/{session_id}/frustration/boost")
 async def boost_frustration(
     session_id: str,
-    background_tasks: BackgroundTasks,
     current_user: dict = Depends(get_current_user),
 ):
     """
@@ -522,18 +654,21 @@ async def boost_frustration(
     Each boost adds DEMO_BOOST_AMOUNT to the frustration score.
     """
     user_id = current_user["user_id"]
+    now, now_ms = utc_now()
 
     # Increment demo boost counter in session
     result = await Collections.sessions().find_one_and_update(
         {"session_id": session_id},
         {
             "$inc": {"frustration_context.demo_boosts": 1},
-            "$set": {"frustration_context.last_boost": datetime.utcnow()},
+            "$set": {"frustration_context.last_boost": now},
         },
         upsert=True,
         return_document=True,
     )
 
+    _frustration_cache.invalidate(session_id)
+
     demo_boosts = result.get("frustration_context", {}).get("demo_boosts", 1) if result else 1
     demo_boost_score = min(0.5, demo_boosts * DEMO_BOOST_AMOUNT)
 
@@ -544,22 +679,18 @@ async def boost_frustration(
         "user_id": user_id,
         "session_id": session_id,
         "event_type": "frustration_boost",
-        "timestamp": datetime.utcnow(),
+        "timestamp": now,
         "properties": {
             "boost_number": demo_boosts,
             "demo_mode": True,
         },
         "forwarded_to_amplitude": False,
     }
-    await Collections.events().insert_one(event_doc)
-
-    background_tasks.add_task(
-        forward_to_amplitude,
-        event_id=event_id,
-        user_id=user_id,
-        event_type="frustration_boost",
-        timestamp=int(event_doc["timestamp"].timestamp() * 1000),
-        properties={
+    # Stored in the next batched insert, then forwarded to Amplitude
+    event_writer.submit(
+        event_doc,
+        timestamp_ms=now_ms,
+        amplitude_properties={
             "session_id": session_id,
             "boost_number": demo_boosts,
             "demo_mode": True,
@@ -574,10 +705,16 @@ async def boost_frustration(
     }
 
 
-def calculate_natural_frustration(events: list, session: dict) -> dict:
+def calculate_natural_frustration(
+    events: list, session: dict, has_unscored_events: bool = False
+) -> dict:
     """
     Calculate natural frustration score from behavioral events.
     Returns score (0-1) and contributing factors.
+
+    events holds only the scored event types; has_unscored_events marks a
+    session that has other events, which still accrues time stuck and
+    minimal progress.
     """
     factors = {
         "error_streak": 0,
@@ -586,37 +723,40 @@ def calculate_natural_frustration(events: list, session: dict) -> dict:
         "minimal_progress": False,
     }
 
-    if not events:
+    if not events and not has_unscored_events:
         return {"score": 0.0, "factors": factors}
 
-    # Count error streak
+    # One pass over the (newest first) events: the error streak runs back to
+    # the last successful run, failed runs and code changes count everywhere
     error_streak = 0
+    failed_runs = 0
+    code_changes = 0
+    streak_open = True
     for event in events:
-        if event.get("event_type") == "error_emitted":
-            error_streak += 1
-        elif event.get("event_type") in ["test_cases_ran", "run_attempted"]:
-            props = event.get("properties", {})
+        event_type = event.get("event_type")
+        if event_type == "error_emitted":
+            if streak_open:
+                error_streak += 1
+        elif event_type in _RUN_EVENT_TYPES:
+            props = event.get("properties") or {}
+            if not props.get("passed", False):
+                failed_runs += 1
             if props.get("passed") or props.get("tests_passed", 0) > 0:
-                break
+                streak_open = False
+        elif event_type == "code_changed":
+            code_changes += 1
     factors["error_streak"] = error_streak
-
-    # Count failed runs
-    failed_runs = sum(
-        1 for e in events
-        if e.get("event_type") in ["test_cases_ran", "run_attempted"]
-        and not e.get("properties", {}).get("passed", False)
-    )
     factors["failed_runs"] = failed_runs
 
     # Calculate time stuck (from session start or last success)
-    session_start = session.get("started_at", datetime.utcnow())
+    now = datetime.utcnow()
+    session_start = session.get("started_at", now)
     if isinstance(session_start, datetime):
-        time_stuck_ms = (datetime.utcnow() - session_start).total_seconds() * 1000
+        time_stuck_ms = (now - session_start).total_seconds() * 1000
         factors["time_stuck_minutes"] = round(time_stuck_ms / 60000, 1)
 
     # Check for minimal code changes
-    code_events = [e for e in events if e.get("event_type") == "code_changed"]
-    if len(code_events) < 3:
+    if code_changes < 3:
         factors["minimal_progress"] = True
 
     # Calculate score (0-1)
@@ -641,34 +781,37 @@ def calculate_natural_frustration(events: list, session: dict) -> dict:
 @router.post("/session/hints", response_model=ContextualHintResponse)
 async def request_contextual_hint(
     request: ContextualHintRequest,
-    background_tasks: BackgroundTasks,
     current_user: dict = Depends(get_current_user),
 ):
     """
     Request a contextual hint based on the user's code history in the current session.
     Uses Backboard's Claude model for empathetic, pedagogical hints.
     """
-    # Get session with code history
-    session = await Collections.sessions().find_one({"session_id": request.session_id})
-    
-    if not session:
-        # Create session if it doesn't exist
-        session = {
-            "session_id": request.session_id,
-            "user_id": current_user["user_id"],
-            "task_id": request.task_id,
-            "code_history": [],
-            "started_at": datetime.utcnow(),
-        }
-        await Collections.sessions().insert_one(session)
+    # Get session with code history (creating it if it doesn't exist, in the
+    # same round trip) and the task description concurrently
+    session, task = await asyncio.gather(
+        Collections.sessions().find_one_and_update(
+            {"session_id": request.session_id},
+            {
+                "$setOnInsert": {
+                    "user_id": current_user["user_id"],
+                    "task_id": request.task_id,
+                    "code_history": [],
+                    "started_at": datetime.utcnow(),
+                }
+            },
+            projection=_CONTEXTUAL_HINT_SESSION_FIELDS,
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        ),
+        _get_task_description(request.task_id),
+    )
     
     if session.get("user_id") != current_user["user_id"]:
         raise HTTPException(
             status_code=403, detail="Not authorized to access this session"
         )
     
-    # Get task description
-    task = await Collections.tasks().find_one({"task_id": request.task_id})
     task_description = task.get("description", "Unknown task") if task else "Unknown task"
     
     # Get code history from session
@@ -686,33 +829,20 @@ async def request_contextual_hint(
     
     # Store hint for tracking
     hint_id = str(ObjectId())
-    await Collections.interventions().insert_one({
+    now, now_ms = utc_now()
+    intervention_doc = {
         "_id": hint_id,
         "session_id": request.session_id,
         "user_id": current_user["user_id"],
         "task_id": request.task_id,
-        "triggered_at": datetime.utcnow(),
+        "triggered_at": now,
         "trigger_reason": "user_requested",
         "intervention_type": "contextual_hint",
         "hint_text": hint_result["hint"],
         "hint_context": hint_result["context"],
         "acknowledged": False,
-    })
+    }
 
-    # Update session ai_context so hint persists between polls
-    await Collections.sessions().update_one(
-        {"session_id": request.session_id},
-        {
-            "$set": {
-                "ai_context.is_stuck": True,
-                "ai_context.last_hint": hint_result["hint"],
-                "ai_context.hint_category": "contextual",
-                "ai_context.intervention_type": "user_requested",
-                "ai_context.stuck_since": datetime.utcnow(),
-            }
-        },
-    )
-    
     # Track to Amplitude
     event_id = str(ObjectId())
     event_doc = {
@@ -721,7 +851,7 @@ async def request_contextual_hint(
         "session_id": request.session_id,
         "task_id": request.task_id,
         "event_type": "contextual_hint_shown",
-        "timestamp": datetime.utcnow(),
+        "timestamp": now,
         "properties": {
             "hint_category": "contextual",
             "code_history_length": len(code_history),
@@ -729,15 +859,31 @@ async def request_contextual_hint(
         },
         "forwarded_to_amplitude": False,
     }
-    await Collections.events().insert_one(event_doc)
-    
-    background_tasks.add_task(
-        forward_to_amplitude,
-        event_id=event_id,
-        user_id=current_user["user_id"],
-        event_type="contextual_hint_shown",
-        timestamp=int(event_doc["timestamp"].timestamp() * 1000),
-        properties={
+
+    # The intervention record and the session's ai_context (so the hint
+    # persists between polls) are independent writes; overlap them
+    await asyncio.gather(
+        Collections.interventions().insert_one(intervention_doc),
+        Collections.sessions().update_one(
+            {"session_id": request.session_id},
+            {
+                "$set": {
+                    "ai_context.is_stuck": True,
+                    "ai_context.last_hint": hint_result["hint"],
+                    "ai_context.hint_category": "contextual",
+                    "ai_context.intervention_type": "user_requested",
+                    "ai_context.stuck_since": now,
+                }
+            },
+        ),
+    )
+    active_session_cache.invalidate(current_user["user_id"])
+    intervention_cache.invalidate(request.session_id)
+
+    event_writer.submit(
+        event_doc,
+        timestamp_ms=now_ms,
+        amplitude_properties={
             "session_id": request.session_id,
             "task_id": request.task_id,
             "hint_category": "contextual",
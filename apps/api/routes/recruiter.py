@@ -12,17 +12,29 @@ from pydantic import BaseModel
 from typing import Optional
 from datetime import datetime
 from bson import ObjectId
-import aiofiles
+import asyncio
+import hashlib
+import json
 import os
 
 from middleware.auth import get_current_user
 from db.collections import Collections
 from services.backboard import BackboardService
-from services.amplitude import forward_to_amplitude
+from services.event_writer import event_writer
 from services.twelvelabs import upload_video_to_twelvelabs
+from utils.files import save_upload
+from utils.timeutils import utc_now
+from routes.jobs import get_cached_job, recruiter_job_list_cache
 from routes.passport import ARCHETYPES
 
 UPLOAD_DIR = "/tmp/video_uploads"
+# Enforced on the incoming body by UploadSizeLimitMiddleware (see main.py)
+MAX_VIDEO_UPLOAD_BYTES = 2 << 30  # 2 GiB
+
+# Display labels by archetype key (unknown archetypes show their key)
+_ARCHETYPE_LABELS = {
+    key: info.get("label", key) for key, info in ARCHETYPES.items()
+}
 
 router = APIRouter()
 
@@ -83,55 +95,53 @@ async def get_candidates(
     current_user: dict = Depends(require_recruiter),
 ):
     """Get list of candidates with their passport data. Recruiters only."""
-    # Build query for candidate users
-    user_query = {"role": "candidate"}
-    users = await Collections.users().find(user_query).to_list(length=1000)
-
+    # One aggregation instead of a passport, session count and video lookup
+    # per candidate; video readiness is denormalized onto the passport
+    pipeline = [
+        {"$match": {"role": "candidate"}},
+        {"$limit": 1000},
+        {"$project": {"display_name": 1, "email": 1, "sessions_completed": 1}},
+        {"$lookup": {
+            "from": "passports",
+            "localField": "_id",
+            "foreignField": "user_id",
+            "pipeline": [
+                {"$project": {
+                    "_id": 0,
+                    "archetype": 1,
+                    "metrics": 1,
+                    "interview_video_id": 1,
+                    "interview_video_ready": 1,
+                }},
+            ],
+            "as": "passport",
+        }},
+        {"$set": {"passport": {"$first": "$passport"}}},
+    ]
+    if archetype:
+        pipeline.append({"$match": {"passport.archetype": archetype}})
+    # Build each response row as its cursor batch arrives rather than
+    # materializing all 1000 user documents first
     candidates = []
-    for user in users:
-        user_id = user["_id"]
+    async for user in Collections.users().aggregate(pipeline, batchSize=100):
+        passport = user.get("passport") or {}
+        user_archetype = passport.get("archetype")
 
-        # Get passport data
-        passport = await Collections.passports().find_one({"user_id": user_id})
-
-        # Apply archetype filter if specified
-        user_archetype = passport.get("archetype") if passport else None
-        if archetype and user_archetype != archetype:
-            continue
-
-        # Get session count
-        sessions_completed = await Collections.sessions().count_documents(
-            {"user_id": user_id, "submitted": True}
+        archetype_label = (
+            _ARCHETYPE_LABELS.get(user_archetype, user_archetype) if user_archetype else None
         )
 
-        # Check if user has video
-        has_video = False
-        if passport and passport.get("interview_video_id"):
-            video = await Collections.videos().find_one(
-                {"_id": passport["interview_video_id"], "status": "ready"}
-            )
-            has_video = video is not None
-
-        # Build archetype info
-        archetype_label = None
-        if user_archetype:
-            archetype_info = ARCHETYPES.get(user_archetype, {})
-            archetype_label = archetype_info.get("label", user_archetype)
-
-        # Build metrics
-        metrics = {}
-        if passport and passport.get("metrics"):
-            metrics = passport["metrics"]
-
         candidates.append({
-            "user_id": str(user_id),
+            "user_id": str(user["_id"]),
             "display_name": user.get("display_name", ""),
             "email": user.get("email", ""),
             "archetype": user_archetype,
             "archetype_label": archetype_label,
-            "metrics": metrics,
-            "sessions_completed": sessions_completed,
-            "has_video": has_video,
+            "metrics": passport.get("metrics") or {},
+            "sessions_completed": user.get("sessions_completed", 0),
+            "has_video": bool(
+                passport.get("interview_video_id") and passport.get("interview_video_ready")
+            ),
         })
 
     return {
@@ -142,7 +152,6 @@ async def get_candidates(
 
 @router.get("/candidates/ranked", response_model=RankedCandidatesResponse)
 async def get_ranked_candidates(
-    background_tasks: BackgroundTasks,
     job_id: Optional[str] = Query(None, description="Job ID to rank candidates for"),
     limit: int = Query(50, description="Maximum number of candidates to return"),
     current_user: dict = Depends(require_recruiter),
@@ -156,7 +165,7 @@ async def get_ranked_candidates(
     job_requirements = {}
     
     if job_id:
-        job = await Collections.jobs().find_one({"job_id": job_id})
+        job = await get_cached_job(job_id)
         if not job:
             raise HTTPException(status_code=404, detail="Job not found")
         job_requirements = {
@@ -166,21 +175,31 @@ async def get_ranked_candidates(
             "title": job.get("title", ""),
         }
     
-    # Get all candidates
-    candidates_cursor = Collections.users().find({
-        "role": "candidate",
-    }).limit(limit)
+    # Get all candidates with their passport in one aggregation
+    users = await Collections.users().aggregate([
+        {"$match": {"role": "candidate"}},
+        {"$limit": limit},
+        {"$project": {
+            "display_name": 1,
+            "email": 1,
+            "archetype": 1,
+            "radar_profile": 1,
+            "integrity_score": 1,
+            "sessions_completed": 1,
+        }},
+        {"$lookup": {
+            "from": "passports",
+            "localField": "_id",
+            "foreignField": "user_id",
+            "pipeline": [{"$project": {"_id": 0, "archetype": 1}}],
+            "as": "passport",
+        }},
+        {"$set": {"passport": {"$first": "$passport"}}},
+    ]).to_list(length=limit)
     
     candidates = []
-    async for user in candidates_cursor:
-        # Get session count
-        sessions_count = await Collections.sessions().count_documents({
-            "user_id": user["_id"],
-            "submitted": True,
-        })
-        
-        # Get passport for additional data
-        passport = await Collections.passports().find_one({"user_id": user["_id"]})
+    for user in users:
+        passport = user.get("passport")
         
         candidates.append({
             "user_id": str(user["_id"]),
@@ -188,9 +207,8 @@ async def get_ranked_candidates(
             "email": user.get("email"),
             "archetype": user.get("archetype") or (passport.get("archetype") if passport else None),
             "radar_profile": user.get("radar_profile", {}),
-            "sessions_completed": sessions_count,
+            "sessions_completed": user.get("sessions_completed", 0),
             "integrity_score": user.get("integrity_score"),
-            "skill_vector": passport.get("skill_vector", []) if passport else [],
         })
     
     if not candidates:
@@ -233,27 +251,24 @@ async def get_ranked_candidates(
     ]
     
     # Track event to Amplitude
+    now, now_ms = utc_now()
     event_id = str(ObjectId())
     event_doc = {
         "_id": event_id,
         "user_id": current_user["user_id"],
         "event_type": "candidate_ranking_viewed",
-        "timestamp": datetime.utcnow(),
+        "timestamp": now,
         "properties": {
             "job_id": job_id,
             "candidates_count": len(response_candidates),
         },
         "forwarded_to_amplitude": False,
     }
-    await Collections.events().insert_one(event_doc)
-    
-    background_tasks.add_task(
-        forward_to_amplitude,
-        event_id=event_id,
-        user_id=current_user["user_id"],
-        event_type="candidate_ranking_viewed",
-        timestamp=int(event_doc["timestamp"].timestamp() * 1000),
-        properties={
+    # Stored in the next batched insert, then forwarded to Amplitude
+    event_writer.submit(
+        event_doc,
+        timestamp_ms=now_ms,
+        amplitude_properties={
             "job_id": job_id,
             "candidates_count": len(response_candidates),
         },
@@ -263,63 +278,90 @@ async def get_ranked_candidates(
         candidates=response_candidates,
         job_id=job_id,
         total_candidates=len(response_candidates),
-        ranking_timestamp=datetime.utcnow(),
+        ranking_timestamp=now,
     )
 
 
+def _candidate_analysis_key(candidate_data: dict, job: dict, job_id: Optional[str]) -> str:
+    """Key a fit analysis by candidate, job and a digest of every model input."""
+    digest = hashlib.sha256(
+        json.dumps([candidate_data, job], sort_keys=True, default=str).encode()
+    ).hexdigest()
+    return f"{candidate_data['user_id']}:{job_id or ''}:{digest}"
+
+
 @router.get("/candidates/{user_id}/analysis", response_model=CandidateAnalysis)
 async def get_candidate_analysis(
     user_id: str,
-    background_tasks: BackgroundTasks,
     job_id: Optional[str] = Query(None, description="Job ID to analyze fit for"),
     current_user: dict = Depends(require_recruiter),
 ):
     """
     Get detailed AI analysis for a specific candidate.
     """
-    # Get candidate
-    candidate = await Collections.users().find_one({"_id": user_id})
+    # The candidate (only the fields the analysis prompt uses), their passport
+    # (only needed for its archetype) and the job are independent, so fetch
+    # them concurrently
+    candidate, passport, job_doc = await asyncio.gather(
+        Collections.users().find_one(
+            {"_id": user_id},
+            projection={
+                "display_name": 1,
+                "archetype": 1,
+                "radar_profile": 1,
+                "sessions_completed": 1,
+                "integrity_score": 1,
+            },
+        ),
+        Collections.passports().find_one(
+            {"user_id": user_id}, projection={"_id": 0, "archetype": 1}
+        ),
+        get_cached_job(job_id) if job_id else asyncio.sleep(0, result=None),
+    )
     if not candidate:
         raise HTTPException(status_code=404, detail="Candidate not found")
     
-    # Get passport
-    passport = await Collections.passports().find_one({"user_id": user_id})
-    
-    # Get sessions count
-    sessions_count = await Collections.sessions().count_documents({
-        "user_id": user_id,
-        "submitted": True,
-    })
-    
     # Prepare candidate data
     candidate_data = {
         "user_id": user_id,
         "display_name": candidate.get("display_name", "Unknown"),
         "archetype": candidate.get("archetype") or (passport.get("archetype") if passport else None),
         "radar_profile": candidate.get("radar_profile", {}),
-        "sessions_completed": sessions_count,
+        "sessions_completed": candidate.get("sessions_completed", 0),
         "integrity_score": candidate.get("integrity_score"),
-        "skill_vector": passport.get("skill_vector", []) if passport else [],
     }
     
-    # Get job if provided
     job = {}
-    if job_id:
-        job_doc = await Collections.jobs().find_one({"job_id": job_id})
-        if job_doc:
-            job = {
-                "target_radar": job_doc.get("target_radar", {}),
-                "title": job_doc.get("title", ""),
-                "description": job_doc.get("description", ""),
-            }
+    if job_doc:
+        job = {
+            "target_radar": job_doc.get("target_radar", {}),
+            "title": job_doc.get("title", ""),
+            "description": job_doc.get("description", ""),
+        }
     
-    # Get detailed analysis from Backboard
-    backboard = BackboardService(current_user["user_id"])
-    analysis = await backboard.explain_candidate_fit(
-        candidate=candidate_data,
-        job=job,
-        amplitude_data=None,  # Could fetch actual analytics here
+    now, now_ms = utc_now()
+
+    # Reuse the last analysis for exactly these inputs; otherwise ask Backboard
+    cache_key = _candidate_analysis_key(candidate_data, job, job_id)
+    cached = await Collections.candidate_analyses().find_one(
+        {"_id": cache_key}, projection={"analysis": 1}
     )
+    if cached:
+        analysis = cached["analysis"]
+    else:
+        backboard = BackboardService(current_user["user_id"])
+        analysis = await backboard.explain_candidate_fit(
+            candidate=candidate_data,
+            job=job,
+            amplitude_data=None,  # Could fetch actual analytics here
+        )
+        # A reply that didn't parse falls back to a bare summary; don't pin it
+        if analysis.get("key_strengths"):
+            await Collections.candidate_analyses().update_one(
+                {"_id": cache_key},
+                {"$set": {"analysis": analysis, "cached_at": now}},
+                upsert=True,
+            )
     
     # Track event to Amplitude
     event_id = str(ObjectId())
@@ -327,22 +369,18 @@ async def get_candidate_analysis(
         "_id": event_id,
         "user_id": current_user["user_id"],
         "event_type": "candidate_analysis_viewed",
-        "timestamp": datetime.utcnow(),
+        "timestamp": now,
         "properties": {
             "candidate_id": user_id,
             "job_id": job_id,
         },
         "forwarded_to_amplitude": False,
     }
-    await Collections.events().insert_one(event_doc)
-    
-    background_tasks.add_task(
-        forward_to_amplitude,
-        event_id=event_id,
-        user_id=current_user["user_id"],
-        event_type="candidate_analysis_viewed",
-        timestamp=int(event_doc["timestamp"].timestamp() * 1000),
-        properties={
+    # Stored in the next batched insert, then forwarded to Amplitude
+    event_writer.submit(
+        event_doc,
+        timestamp_ms=now_ms,
+        amplitude_properties={
             "candidate_id": user_id,
             "job_id": job_id,
         },
@@ -360,14 +398,10 @@ async def get_candidate_analysis(
     )
 
 
-@router.get("/jobs")
-async def list_jobs_for_recruiter(
-    current_user: dict = Depends(require_recruiter),
-):
-    """
-    List all jobs for the recruiter to select for candidate ranking.
-    """
-    jobs_cursor = Collections.jobs().find({})
+async def _load_recruiter_jobs() -> list[dict]:
+    jobs_cursor = Collections.jobs().find(
+        {}, projection={"_id": 0, "job_id": 1, "title": 1, "company": 1, "target_radar": 1}
+    )
     jobs = []
 
     async for job in jobs_cursor:
@@ -378,6 +412,17 @@ async def list_jobs_for_recruiter(
             "has_target_radar": bool(job.get("target_radar")),
         })
 
+    return jobs
+
+
+@router.get("/jobs")
+async def list_jobs_for_recruiter(
+    current_user: dict = Depends(require_recruiter),
+):
+    """
+    List all jobs for the recruiter to select for candidate ranking.
+    """
+    jobs = await recruiter_job_list_cache.get(None, _load_recruiter_jobs)
     return {"jobs": jobs}
 
 
@@ -401,7 +446,7 @@ async def upload_candidate_video(
     to be analyzed by TwelveLabs for insights.
     """
     # Verify candidate exists
-    candidate = await Collections.users().find_one({"_id": candidate_id})
+    candidate = await Collections.users().find_one({"_id": candidate_id}, projection={"_id": 1})
     if not candidate:
         raise HTTPException(status_code=404, detail="Candidate not found")
 
@@ -421,9 +466,10 @@ async def upload_candidate_video(
     # Save file temporarily
     file_path = os.path.join(UPLOAD_DIR, f"{video_id}_{file.filename}")
 
-    async with aiofiles.open(file_path, "wb") as f:
-        content = await file.read()
-        await f.write(content)
+    # Stream to disk in chunks so large recordings are never fully buffered
+    await asyncio.to_thread(save_upload, file.file, file_path, file.size)
+
+    now, now_ms = utc_now()
 
     # Create video document (owned by candidate, uploaded by recruiter)
     video_doc = {
@@ -435,7 +481,7 @@ async def upload_candidate_video(
         "filename": file.filename,
         "file_path": file_path,
         "content_type": file.content_type,
-        "uploaded_at": datetime.utcnow(),
+        "uploaded_at": now,
     }
 
     await Collections.videos().insert_one(video_doc)
@@ -446,6 +492,7 @@ async def upload_candidate_video(
         {
             "$set": {
                 "interview_video_id": video_id,
+                "interview_video_ready": False,
                 "interview_highlights": [],
             }
         },
@@ -466,22 +513,18 @@ async def upload_candidate_video(
         "_id": event_id,
         "user_id": current_user["user_id"],
         "event_type": "recruiter_video_uploaded",
-        "timestamp": datetime.utcnow(),
+        "timestamp": now,
         "properties": {
             "candidate_id": candidate_id,
             "video_id": video_id,
         },
         "forwarded_to_amplitude": False,
     }
-    await Collections.events().insert_one(event_doc)
-
-    background_tasks.add_task(
-        forward_to_amplitude,
-        event_id=event_id,
-        user_id=current_user["user_id"],
-        event_type="recruiter_video_uploaded",
-        timestamp=int(event_doc["timestamp"].timestamp() * 1000),
-        properties={
+    # Stored in the next batched insert, then forwarded to Amplitude
+    event_writer.submit(
+        event_doc,
+        timestamp_ms=now_ms,
+        amplitude_properties={
             "candidate_id": candidate_id,
             "video_id": video_id,
         },
@@ -506,7 +549,7 @@ async def get_candidate_videos(
     including processing status and AI analysis when ready.
     """
     # Verify candidate exists
-    candidate = await Collections.users().find_one({"_id": user_id})
+    candidate = await Collections.users().find_one({"_id": user_id}, projection={"_id": 1})
     if not candidate:
         raise HTTPException(status_code=404, detail="Candidate not found")
 
@@ -519,6 +562,17 @@ async def get_candidate_videos(
             {"uploaded_by": current_user["user_id"]},  # Recruiter-uploaded videos
             {"is_proctored": True}  # Proctored session videos
         ]
+    }, projection={
+        "status": 1,
+        "filename": 1,
+        "uploaded_at": 1,
+        "uploaded_by": 1,
+        "is_proctored": 1,
+        "task_id": 1,
+        "session_id": 1,
+        "summary": 1,
+        "highlights": 1,
+        "communication_analysis": 1,
     }).sort("uploaded_at", -1)
     videos = await videos_cursor.to_list(length=50)
 
@@ -553,7 +607,9 @@ async def delete_candidate_video(
     Recruiters can delete videos associated with candidates.
     """
     # Find the video
-    video = await Collections.videos().find_one({"_id": video_id})
+    video = await Collections.videos().find_one(
+        {"_id": video_id}, projection={"user_id": 1, "file_path": 1}
+    )
 
     if not video:
         raise HTTPException(status_code=404, detail="Video not found")
@@ -576,6 +632,7 @@ async def delete_candidate_video(
         {
             "$set": {
                 "interview_video_id": None,
+                "interview_video_ready": False,
                 "interview_highlights": [],
                 "interview_summary": None,
                 "communication_scores": None,
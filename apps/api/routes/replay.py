@@ -36,8 +36,10 @@ async def get_session_timeline(
 
     Requires: The user must be the session owner or a recruiter.
     """
-    # Verify session exists
-    session = await Collections.sessions().find_one({"session_id": session_id})
+    # Verify session exists (only its owner is needed for the access check)
+    session = await Collections.sessions().find_one(
+        {"session_id": session_id}, projection={"_id": 0, "user_id": 1}
+    )
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
@@ -80,8 +82,10 @@ async def ask_about_session(
 
     Requires: The user must be the session owner or a recruiter.
     """
-    # Verify session exists
-    session = await Collections.sessions().find_one({"session_id": session_id})
+    # Verify session exists (only its owner is needed for the access check)
+    session = await Collections.sessions().find_one(
+        {"session_id": session_id}, projection={"_id": 0, "user_id": 1}
+    )
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
@@ -122,8 +126,10 @@ async def get_quick_insights(
 
     Requires: The user must be the session owner or a recruiter.
     """
-    # Verify session exists
-    session = await Collections.sessions().find_one({"session_id": session_id})
+    # Verify session exists (only its owner is needed for the access check)
+    session = await Collections.sessions().find_one(
+        {"session_id": session_id}, projection={"_id": 0, "user_id": 1}
+    )
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
@@ -162,50 +168,69 @@ async def get_user_sessions(
     if current_user_id != user_id and user_role != "recruiter":
         raise HTTPException(status_code=403, detail="Access denied")
 
-    # Fetch sessions with events (to ensure they're replayable)
-    sessions_cursor = Collections.sessions().find(
-        {"user_id": user_id}
-    ).sort("started_at", -1)
-    sessions = await sessions_cursor.to_list(length=50)
+    # One aggregation joins each session's event count, task title, ready
+    # video and linked ProctoringSession instead of querying them per session
+    pipeline = [
+        {"$match": {"user_id": user_id}},
+        {"$sort": {"started_at": -1}},
+        {"$limit": 50},
+        {"$project": {
+            "_id": 0,
+            "session_id": 1,
+            "task_id": 1,
+            "started_at": 1,
+            "ended_at": 1,
+            "is_proctored": 1,
+            "code_snapshots": {"$size": {"$ifNull": ["$code_history", []]}},
+            "last_snapshot": {"$last": "$code_history"},
+        }},
+        {"$lookup": {
+            "from": "events",
+            "localField": "session_id",
+            "foreignField": "session_id",
+            "pipeline": [{"$count": "n"}],
+            "as": "event_count",
+        }},
+        # Only include sessions with events (to ensure they're replayable)
+        {"$match": {"event_count.0": {"$exists": True}}},
+        {"$lookup": {
+            "from": "tasks",
+            "localField": "task_id",
+            "foreignField": "task_id",
+            "pipeline": [{"$limit": 1}, {"$project": {"_id": 0, "title": 1}}],
+            "as": "task",
+        }},
+        {"$lookup": {
+            "from": "videos",
+            "localField": "session_id",
+            "foreignField": "session_id",
+            "pipeline": [
+                {"$match": {"status": "ready"}},
+                {"$limit": 1},
+                {"$project": {"_id": 1}},
+            ],
+            "as": "video",
+        }},
+        {"$lookup": {
+            "from": "proctoring_sessions",
+            "localField": "session_id",
+            "foreignField": "session_id",
+            "pipeline": [{"$limit": 1}, {"$project": {"_id": 1}}],
+            "as": "proctoring",
+        }},
+    ]
+    sessions = await Collections.sessions().aggregate(pipeline).to_list(length=50)
 
     result = []
     for session in sessions:
         session_id = session.get("session_id")
+        task = session["task"][0] if session["task"] else None
+        video = session["video"][0] if session["video"] else None
+        last_snapshot = session.get("last_snapshot")
+        final_code = last_snapshot.get("code") if last_snapshot else None
 
-        # Get event count for this session
-        event_count = await Collections.events().count_documents(
-            {"session_id": session_id}
-        )
-
-        # Only include sessions with events
-        if event_count == 0:
-            continue
-
-        # Get task info
-        task_id = session.get("task_id")
-        task = await Collections.tasks().find_one({"task_id": task_id})
-
-        # Check if video is linked
-        video = await Collections.videos().find_one({
-            "session_id": session_id,
-            "status": "ready"
-        })
-
-        # Get code history and final code
-        code_history = session.get("code_history", [])
-        final_code = None
-        if code_history:
-            final_code = code_history[-1].get("code")
-
-        # Check if session is proctored
-        # First check the session's own is_proctored field, then check proctoring_sessions collection
-        is_proctored = session.get("is_proctored", False)
-        if not is_proctored:
-            # Fallback: check if there's a linked ProctoringSession
-            proctoring = await Collections.proctoring_sessions().find_one({
-                "session_id": session_id
-            })
-            is_proctored = proctoring is not None
+        # The session's own is_proctored field, else a linked ProctoringSession
+        is_proctored = session.get("is_proctored", False) or bool(session["proctoring"])
 
         # Generate brief insights summary for proctored sessions
         insights_summary = None
@@ -216,12 +241,12 @@ async def get_user_sessions(
 
         result.append({
             "session_id": session_id,
-            "task_id": task_id,
+            "task_id": session.get("task_id"),
             "task_title": task.get("title", "Unknown") if task else "Unknown",
             "started_at": session.get("started_at"),
             "ended_at": session.get("ended_at"),
-            "event_count": event_count,
-            "code_snapshots": len(code_history),
+            "event_count": session["event_count"][0]["n"],
+            "code_snapshots": session["code_snapshots"],
             "has_video": video is not None,
             "video_id": str(video.get("_id")) if video else None,
             "is_proctored": is_proctored,
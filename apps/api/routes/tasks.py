@@ -1,6 +1,5 @@
 from fastapi import APIRouter, HTTPException, status, Depends, BackgroundTasks
 from pydantic import BaseModel
-from datetime import datetime
 from bson import ObjectId
 
 from middleware.auth import get_current_user
@@ -15,9 +14,11 @@ from models.task import (
     SubmitResult,
 )
 from services.sandbox import execute_code
-from services.amplitude import forward_to_amplitude
+from services.amplitude import enqueue_amplitude_event
+from services.ai_worker import active_session_cache
 from services.skillgraph import update_passport_after_submit, update_skill_proficiencies_after_submit
 from services.task_recommender import get_recommended_tasks
+from utils.timeutils import utc_now
 
 router = APIRouter()
 
@@ -212,7 +213,6 @@ async def get_task(
 async def run_code(
     task_id: str,
     submission: TaskSubmission,
-    background_tasks: BackgroundTasks,
     current_user: dict = Depends(get_current_user),
 ):
     """Execute code in sandbox and run tests."""
@@ -278,6 +278,8 @@ async def run_code(
     tests_passed = sum(1 for result in results if result.passed)
     tests_total = len(results)
 
+    now, now_ms = utc_now()
+
     event_id = str(ObjectId())
     event_doc = {
         "_id": event_id,
@@ -285,7 +287,7 @@ async def run_code(
         "session_id": submission.session_id,
         "task_id": task_id,
         "event_type": "test_cases_ran",
-        "timestamp": datetime.utcnow(),
+        "timestamp": now,
         "properties": {
             "tests_passed": tests_passed,
             "tests_total": tests_total,
@@ -297,12 +299,11 @@ async def run_code(
     }
 
     await Collections.events().insert_one(event_doc)
-    background_tasks.add_task(
-        forward_to_amplitude,
+    enqueue_amplitude_event(
         event_id=event_id,
         user_id=current_user["user_id"],
         event_type="test_cases_ran",
-        timestamp=int(event_doc["timestamp"].timestamp() * 1000),
+        timestamp=now_ms,
         properties={
             "session_id": submission.session_id,
             "task_id": task_id,
@@ -316,7 +317,7 @@ async def run_code(
     # Store code snapshot in session for contextual hints (Feature 1)
     code_snapshot = {
         "code": submission.code,
-        "timestamp": datetime.utcnow(),
+        "timestamp": now,
         "error": stderr_all[:500] if stderr_all else None,
         "passed": all_passed,
         "tests_passed": tests_passed,
@@ -334,12 +335,12 @@ async def run_code(
             },
             "$set": {
                 "current_code_snapshot": submission.code,
-                "last_run_at": datetime.utcnow(),
+                "last_run_at": now,
             },
             "$setOnInsert": {
                 "user_id": current_user["user_id"],
                 "task_id": task_id,
-                "started_at": datetime.utcnow(),
+                "started_at": now,
             },
         },
         upsert=True,
@@ -394,12 +395,14 @@ async def submit_solution(
     passed = passed_count == total_count
     score = int((passed_count / total_count) * 100) if total_count > 0 else 0
 
-    # Update session
-    await Collections.sessions().update_one(
+    now, now_ms = utc_now()
+
+    # Update session (the pre-update document tells us if this is its first submission)
+    previous = await Collections.sessions().find_one_and_update(
         {"session_id": submission.session_id},
         {
             "$set": {
-                "ended_at": datetime.utcnow(),
+                "ended_at": now,
                 "submitted": True,
                 "passed": passed,
                 "score": score,
@@ -408,11 +411,20 @@ async def submit_solution(
                 "session_id": submission.session_id,
                 "user_id": current_user["user_id"],
                 "task_id": task_id,
-                "started_at": datetime.utcnow(),
+                "started_at": now,
             },
         },
+        projection={"submitted": 1},
         upsert=True,
     )
+    if not (previous and previous.get("submitted")):
+        # Denormalized count read by the recruiter candidate listings
+        await Collections.users().update_one(
+            {"_id": current_user["user_id"]},
+            {"$inc": {"sessions_completed": 1}},
+        )
+    # The session is no longer active; drop it from the radar's active-session cache
+    active_session_cache.invalidate(current_user["user_id"])
 
     event_id = str(ObjectId())
     event_doc = {
@@ -421,7 +433,7 @@ async def submit_solution(
         "session_id": submission.session_id,
         "task_id": task_id,
         "event_type": "task_submitted",
-        "timestamp": datetime.utcnow(),
+        "timestamp": now,
         "properties": {
             "tests_passed": passed_count,
             "tests_total": total_count,
@@ -433,12 +445,11 @@ async def submit_solution(
     }
 
     await Collections.events().insert_one(event_doc)
-    background_tasks.add_task(
-        forward_to_amplitude,
+    enqueue_amplitude_event(
         event_id=event_id,
         user_id=current_user["user_id"],
         event_type="task_submitted",
-        timestamp=int(event_doc["timestamp"].timestamp() * 1000),
+        timestamp=now_ms,
         properties={
             "session_id": submission.session_id,
             "task_id": task_id,
@@ -458,7 +469,7 @@ async def submit_solution(
                 "task_id": task_id,
                 "code": submission.code,
                 "language": language,
-                "submitted_at": datetime.utcnow(),
+                "submitted_at": now,
                 "passed": passed,
                 "score": score,
             }
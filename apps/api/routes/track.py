@@ -1,11 +1,12 @@
 from fastapi import APIRouter, Depends, BackgroundTasks
 from datetime import datetime
 from bson import ObjectId
+from pymongo.errors import BulkWriteError
 
 from middleware.auth import get_current_user
 from db.collections import Collections
 from models.event import TrackEvent, TrackEventResponse
-from services.amplitude import forward_to_amplitude
+from services.amplitude import enqueue_amplitude_event
 from services.ai_worker import trigger_analysis
 
 router = APIRouter()
@@ -48,9 +49,8 @@ async def track_event(
 
     await Collections.events().insert_one(event_doc)
 
-    # Forward to Amplitude in background
-    background_tasks.add_task(
-        forward_to_amplitude,
+    # Queue for batched forwarding to Amplitude
+    enqueue_amplitude_event(
         event_id=event_id,
         user_id=current_user["user_id"],
         event_type=event.event_type,
@@ -86,30 +86,39 @@ async def track_events_batch(
     current_user: dict = Depends(get_current_user),
 ):
     """Ingest multiple behavioral events at once."""
-    event_ids = []
-
+    event_docs = []
     for event in events:
-        event_id = str(ObjectId())
-        event_ids.append(event_id)
-
-        event_timestamp = datetime.utcfromtimestamp(event.timestamp / 1000)
-
-        event_doc = {
-            "_id": event_id,
+        event_docs.append({
+            "_id": str(ObjectId()),
             "user_id": current_user["user_id"],
             "session_id": event.session_id,
             "task_id": event.task_id,
             "event_type": event.event_type,
-            "timestamp": event_timestamp,
+            "timestamp": datetime.utcfromtimestamp(event.timestamp / 1000),
             "properties": event.properties,
             "forwarded_to_amplitude": False,
             "processed_for_ml": False,
-        }
+        })
+
+    # One unordered insert for the whole batch; it is awaited so the AI
+    # worker scheduled below sees the stored events
+    failed: set[int] = set()
+    if event_docs:
+        try:
+            await Collections.events().insert_many(event_docs, ordered=False)
+        except BulkWriteError as e:
+            # Unordered, so only the reported documents are missing
+            failed = {err["index"] for err in e.details.get("writeErrors", [])}
+            print(f"{YELLOW}[Track] Failed to insert {len(failed)} of {len(event_docs)} events: {e}{RESET}")
 
-        await Collections.events().insert_one(event_doc)
+    event_ids = []
+    for i, (event, event_doc) in enumerate(zip(events, event_docs)):
+        if i in failed:
+            continue
+        event_id = event_doc["_id"]
+        event_ids.append(event_id)
 
-        background_tasks.add_task(
-            forward_to_amplitude,
+        enqueue_amplitude_event(
             event_id=event_id,
             user_id=current_user["user_id"],
             event_type=event.event_type,
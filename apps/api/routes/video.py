@@ -271,5 +271,9 @@ async def delete_video(
     # Update passport if this was the interview video
     await Collections.passports().update_one(
         {"user_id": current_user["user_id"], "interview_video_id": video_id},
-        {"$set": {"interview_video_id": None, "interview_highlights": []}},
+        {"$set": {
+            "interview_video_id": None,
+            "interview_video_ready": False,
+            "interview_highlights": [],
+        }},
     )
@@ -1,10 +1,10 @@
-from .amplitude import forward_to_amplitude
+from .amplitude import enqueue_amplitude_event
 from .skillgraph import compute_job_fit, update_passport_after_submit
 from .sandbox import execute_code
 from .twelvelabs import upload_video_to_twelvelabs, search_video
 
 __all__ = [
-    "forward_to_amplitude",
+    "enqueue_amplitude_event",
     "compute_job_fit",
     "update_passport_after_submit",
     "execute_code",
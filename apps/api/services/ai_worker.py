@@ -8,6 +8,7 @@ Background task processor for:
 - Personalized hints based on user's code and past problems
 """
 
+import asyncio
 import logging
 from datetime import datetime, timedelta
 from typing import Optional
@@ -15,6 +16,7 @@ from db.collections import Collections
 from services.backboard import BackboardService
 from services.user_error_profile import compute_error_profile
 from config import get_settings
+from utils.cache import AsyncTTLCache
 
 # Configure logging
 logger = logging.getLogger("ai_worker")
@@ -28,6 +30,16 @@ RED = "\033[91m"
 MAGENTA = "\033[95m"
 RESET = "\033[0m"
 
+# Radar endpoint reads, keyed by user_id. The profile only changes when this
+# worker rescores it, so it can live longer; the active session's hint state
+# changes far more often and gets a short TTL on top of explicit invalidation.
+radar_profile_cache = AsyncTTLCache(maxsize=4096, ttl=120.0)
+active_session_cache = AsyncTTLCache(maxsize=4096, ttl=10.0)
+
+# Per-session {user_id, task_id, ai_context} for the intervention poll endpoint.
+# Every write to a session's ai_context must invalidate its entry.
+intervention_cache = AsyncTTLCache(maxsize=4096, ttl=60.0)
+
 
 async def trigger_analysis(session_id: str, user_id: str):
     """
@@ -163,6 +175,8 @@ async def trigger_analysis(session_id: str, user_id: str):
             },
             upsert=True,  # Create session if it doesn't exist
         )
+        active_session_cache.invalidate(user_id)
+        intervention_cache.invalidate(session_id)
 
         # Store intervention for effectiveness tracking
         await Collections.interventions().insert_one(
@@ -570,30 +584,51 @@ async def update_radar_profile(user_id: str, events: list):
         await Collections.users().update_one(
             {"_id": user_id}, {"$set": {"radar_profile": current_radar}}
         )
+        radar_profile_cache.invalidate(user_id)
 
 
-async def acknowledge_intervention(session_id: str, user_id: str):
-    """Mark the current intervention as acknowledged."""
-    # Update session
-    await Collections.sessions().update_one(
-        {"session_id": session_id},
-        {"$set": {"ai_context.is_stuck": False}},
-    )
+async def acknowledge_intervention(
+    session_id: str, user_id: str, projection: Optional[dict] = None
+) -> Optional[dict]:
+    """Mark the current intervention as acknowledged.
 
-    # Update intervention record (use find_one_and_update for sort support)
-    await Collections.interventions().find_one_and_update(
-        {"session_id": session_id, "user_id": user_id, "acknowledged": False},
-        {"$set": {"acknowledged": True, "acknowledged_at": datetime.utcnow()}},
-        sort=[("triggered_at", -1)],
+    Returns the acknowledged intervention record (limited to projection), or
+    None if there was no unacknowledged intervention.
+    """
+    # Update session and intervention record together
+    # (find_one_and_update for sort support; it also hands back the record)
+    _, intervention = await asyncio.gather(
+        Collections.sessions().update_one(
+            {"session_id": session_id},
+            {"$set": {"ai_context.is_stuck": False}},
+        ),
+        Collections.interventions().find_one_and_update(
+            {"session_id": session_id, "user_id": user_id, "acknowledged": False},
+            {"$set": {"acknowledged": True, "acknowledged_at": datetime.utcnow()}},
+            sort=[("triggered_at", -1)],
+            projection=projection,
+        ),
     )
+    active_session_cache.invalidate(user_id)
+    intervention_cache.invalidate(session_id)
+
+    return intervention
 
 
 async def track_intervention_effectiveness(
-    session_id: str, user_id: str, code_changed: bool, issue_resolved: bool
-):
-    """Track whether an intervention was effective."""
+    session_id: str,
+    user_id: str,
+    code_changed: bool,
+    issue_resolved: bool,
+    projection: Optional[dict] = None,
+) -> Optional[dict]:
+    """Track whether an intervention was effective.
+
+    Returns the updated intervention record (limited to projection), or None
+    if there was no acknowledged intervention.
+    """
     # Use find_one_and_update for sort support
-    await Collections.interventions().find_one_and_update(
+    return await Collections.interventions().find_one_and_update(
         {"session_id": session_id, "user_id": user_id, "acknowledged": True},
         {
             "$set": {
@@ -603,4 +638,5 @@ async def track_intervention_effectiveness(
             }
         },
         sort=[("triggered_at", -1)],
+        projection=projection,
     )
@@ -1,5 +1,7 @@
+import asyncio
 import httpx
 import json
+from collections import deque
 from config import get_settings
 from db.collections import Collections
 
@@ -10,68 +12,168 @@ YELLOW = "\033[93m"
 BLUE = "\033[94m"
 RESET = "\033[0m"
 
+# Shared client so event forwarding reuses pooled keep-alive connections
+# instead of paying a TCP/TLS handshake per event.
+_client: httpx.AsyncClient | None = None
 
-async def forward_to_amplitude(
+
+def _get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=100,
+                max_keepalive_connections=20,
+                keepalive_expiry=60.0,
+            ),
+        )
+    return _client
+
+
+async def close_amplitude_client():
+    """Close the shared HTTP client (called on app shutdown)."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def _build_amplitude_event(
     event_id: str,
     user_id: str,
     event_type: str,
     timestamp: int,
     properties: dict,
     user_properties: dict = None,
-):
-    """Forward an event to Amplitude analytics."""
-    settings = get_settings()
-
-    if not settings.amplitude_api_key:
-        # Amplitude not configured, mark as forwarded anyway
-        print(f"{YELLOW}[Amplitude] Skipped '{event_type}' - API key not configured{RESET}")
-        await Collections.events().update_one(
-            {"_id": event_id},
-            {"$set": {"forwarded_to_amplitude": True}},
-        )
-        return
-
+) -> dict:
     amplitude_event = {
         "user_id": user_id,
         "event_type": event_type,
         "time": timestamp,
         "event_properties": properties,
+        # Lets Amplitude drop duplicates if the same event is forwarded twice
+        "insert_id": event_id,
     }
 
     if user_properties:
         amplitude_event["user_properties"] = {"$set": user_properties}
 
-    print(f"{BLUE}[Amplitude] Sending '{event_type}' for user {user_id[:8]}...{RESET}")
+    return amplitude_event
 
-    try:
-        async with httpx.AsyncClient() as client:
+
+# Events queued with enqueue_amplitude_event are sent together, one HTTP
+# request per window, instead of one request and one background task each.
+AMPLITUDE_BATCH_WINDOW_SECONDS = 0.2
+AMPLITUDE_MAX_BATCH = 100
+# Bound on queued events while Amplitude is slow or down; past it the oldest
+# events are dropped (they stay stored with forwarded_to_amplitude=False)
+AMPLITUDE_MAX_PENDING = 10_000
+
+_pending_events: deque[tuple[str, dict]] = deque(maxlen=AMPLITUDE_MAX_PENDING)
+_flush_task: asyncio.Task | None = None
+_batch_full = asyncio.Event()
+dropped_amplitude_events = 0
+
+
+def enqueue_amplitude_event(
+    event_id: str,
+    user_id: str,
+    event_type: str,
+    timestamp: int,
+    properties: dict,
+    user_properties: dict = None,
+):
+    """Queue an event for batched forwarding to Amplitude.
+
+    Returns immediately, so the request doesn't wait on (or hold its
+    connection for) the outbound call the way a BackgroundTasks job does.
+    The event must already be stored with forwarded_to_amplitude=False; the
+    flag is set once the batch is sent.
+    """
+    global _flush_task, dropped_amplitude_events
+    if len(_pending_events) == AMPLITUDE_MAX_PENDING:
+        dropped_amplitude_events += 1
+        if dropped_amplitude_events % 1000 == 1:
+            print(f"{RED}[Amplitude] ✗ Queue full - dropped {dropped_amplitude_events} events so far{RESET}")
+    _pending_events.append((
+        event_id,
+        _build_amplitude_event(
+            event_id, user_id, event_type, timestamp, properties, user_properties
+        ),
+    ))
+    if len(_pending_events) >= AMPLITUDE_MAX_BATCH:
+        # A full batch doesn't need to wait out the window
+        _batch_full.set()
+    if _flush_task is None or _flush_task.done():
+        _flush_task = asyncio.create_task(_flush_later())
+
+
+def _take_batch() -> list[tuple[str, dict]]:
+    count = min(len(_pending_events), AMPLITUDE_MAX_BATCH)
+    return [_pending_events.popleft() for _ in range(count)]
+
+
+async def _flush_later():
+    # Single sender: while a batch is in flight new events wait in the bounded
+    # queue rather than piling up in concurrent requests
+    while _pending_events:
+        if len(_pending_events) < AMPLITUDE_MAX_BATCH:
+            try:
+                await asyncio.wait_for(_batch_full.wait(), AMPLITUDE_BATCH_WINDOW_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+        _batch_full.clear()
+        batch = _take_batch()
+        if batch:  # a shutdown flush may have drained the queue meanwhile
+            await _send_batch(batch)
+
+
+async def flush_amplitude_events():
+    """Send every queued event now (also called on app shutdown)."""
+    while _pending_events:
+        await _send_batch(_take_batch())
+
+
+async def _send_batch(batch: list[tuple[str, dict]]):
+    settings = get_settings()
+    event_ids = [event_id for event_id, _ in batch]
+
+    if not settings.amplitude_api_key:
+        # Amplitude not configured, mark as forwarded anyway
+        print(f"{YELLOW}[Amplitude] Skipped {len(batch)} events - API key not configured{RESET}")
+        success = True
+    else:
+        print(f"{BLUE}[Amplitude] Sending batch of {len(batch)} events...{RESET}")
+        try:
+            client = _get_client()
             response = await client.post(
                 "https://api2.amplitude.com/2/httpapi",
                 json={
                     "api_key": settings.amplitude_api_key,
-                    "events": [amplitude_event],
+                    "events": [event for _, event in batch],
                 },
                 timeout=10.0,
             )
-
             success = response.status_code == 200
-
             if success:
-                print(f"{GREEN}[Amplitude] ✓ Sent '{event_type}' successfully{RESET}")
+                print(f"{GREEN}[Amplitude] ✓ Sent {len(batch)} events successfully{RESET}")
             else:
-                print(f"{RED}[Amplitude] ✗ Failed '{event_type}' - HTTP {response.status_code}: {response.text[:100]}{RESET}")
+                print(f"{RED}[Amplitude] ✗ Failed batch of {len(batch)} - HTTP {response.status_code}: {response.text[:100]}{RESET}")
+        except Exception as e:
+            print(f"{RED}[Amplitude] ✗ Error sending batch of {len(batch)}: {e}{RESET}")
+            success = False
 
-            await Collections.events().update_one(
-                {"_id": event_id},
-                {"$set": {"forwarded_to_amplitude": success}},
-            )
+    if not success:
+        # Already stored with forwarded_to_amplitude=False; nothing to record
+        return
 
-    except Exception as e:
-        print(f"{RED}[Amplitude] ✗ Error sending '{event_type}': {e}{RESET}")
-        await Collections.events().update_one(
-            {"_id": event_id},
-            {"$set": {"forwarded_to_amplitude": False}},
+    try:
+        await Collections.events().update_many(
+            {"_id": {"$in": event_ids}},
+            {"$set": {"forwarded_to_amplitude": True}},
         )
+    except Exception as e:
+        print(f"{RED}[Amplitude] ✗ Error updating forwarded flags: {e}{RESET}")
 
 
 async def update_amplitude_user_properties(user_id: str, properties: dict):
@@ -85,25 +187,25 @@ async def update_amplitude_user_properties(user_id: str, properties: dict):
     print(f"{BLUE}[Amplitude] Updating user properties for {user_id[:8]}...{RESET}")
 
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://api2.amplitude.com/2/httpapi",
-                json={
-                    "api_key": settings.amplitude_api_key,
-                    "events": [
-                        {
-                            "user_id": user_id,
-                            "event_type": "$identify",
-                            "user_properties": {"$set": properties},
-                        }
-                    ],
-                },
-                timeout=10.0,
-            )
-            if response.status_code == 200:
-                print(f"{GREEN}[Amplitude] ✓ Updated user properties{RESET}")
-            else:
-                print(f"{RED}[Amplitude] ✗ Failed to update user properties - HTTP {response.status_code}{RESET}")
+        client = _get_client()
+        response = await client.post(
+            "https://api2.amplitude.com/2/httpapi",
+            json={
+                "api_key": settings.amplitude_api_key,
+                "events": [
+                    {
+                        "user_id": user_id,
+                        "event_type": "$identify",
+                        "user_properties": {"$set": properties},
+                    }
+                ],
+            },
+            timeout=10.0,
+        )
+        if response.status_code == 200:
+            print(f"{GREEN}[Amplitude] ✓ Updated user properties{RESET}")
+        else:
+            print(f"{RED}[Amplitude] ✗ Failed to update user properties - HTTP {response.status_code}{RESET}")
     except Exception as e:
         print(f"{RED}[Amplitude] ✗ Error updating user properties: {e}{RESET}")
 
@@ -129,15 +231,15 @@ async def fetch_event_segmentation(
         "m": metric,
     }
 
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            "https://amplitude.com/api/2/events/segmentation",
-            params=params,
-            auth=(settings.amplitude_api_key, settings.amplitude_secret_key),
-            timeout=20.0,
-        )
-        response.raise_for_status()
-        return response.json()
+    client = _get_client()
+    response = await client.get(
+        "https://amplitude.com/api/2/events/segmentation",
+        params=params,
+        auth=(settings.amplitude_api_key, settings.amplitude_secret_key),
+        timeout=20.0,
+    )
+    response.raise_for_status()
+    return response.json()
 
 
 async def fetch_user_activity(user_id: str) -> dict:
@@ -152,20 +254,20 @@ async def fetch_user_activity(user_id: str) -> dict:
 
     print(f"{BLUE}[Amplitude] Fetching activity for user {user_id[:8]}...{RESET}")
 
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            f"https://amplitude.com/api/2/useractivity",
-            params={"user": user_id},
-            auth=(settings.amplitude_api_key, settings.amplitude_secret_key),
-            timeout=20.0,
-        )
-        
-        if response.status_code == 200:
-            print(f"{GREEN}[Amplitude] ✓ Fetched user activity{RESET}")
-            return response.json()
-        else:
-            print(f"{RED}[Amplitude] ✗ Failed to fetch user activity - HTTP {response.status_code}{RESET}")
-            return {}
+    client = _get_client()
+    response = await client.get(
+        f"https://amplitude.com/api/2/useractivity",
+        params={"user": user_id},
+        auth=(settings.amplitude_api_key, settings.amplitude_secret_key),
+        timeout=20.0,
+    )
+    
+    if response.status_code == 200:
+        print(f"{GREEN}[Amplitude] ✓ Fetched user activity{RESET}")
+        return response.json()
+    else:
+        print(f"{RED}[Amplitude] ✗ Failed to fetch user activity - HTTP {response.status_code}{RESET}")
+        return {}
 
 
 async def fetch_user_event_counts(user_id: str, event_types: list[str] = None) -> dict:
@@ -313,73 +415,73 @@ async def get_amplitude_ai_profile(user_id: str) -> dict:
     print(f"{BLUE}[Amplitude AI] Fetching AI profile for user {user_id[:8]}...{RESET}")
     
     try:
-        async with httpx.AsyncClient() as client:
-            # Fetch full user profile with computations, cohorts, and properties
-            response = await client.get(
-                "https://profile-api.amplitude.com/v1/userprofile",
-                params={
-                    "user_id": user_id,
-                    "get_amp_props": "true",      # User properties
-                    "get_cohort_ids": "true",     # Behavioral cohort memberships
-                    "get_computations": "true",   # ML-computed properties
-                },
-                headers={
-                    "Authorization": f"Api-Key {settings.amplitude_secret_key}"
-                },
-                timeout=15.0,
-            )
+        client = _get_client()
+        # Fetch full user profile with computations, cohorts, and properties
+        response = await client.get(
+            "https://profile-api.amplitude.com/v1/userprofile",
+            params={
+                "user_id": user_id,
+                "get_amp_props": "true",      # User properties
+                "get_cohort_ids": "true",     # Behavioral cohort memberships
+                "get_computations": "true",   # ML-computed properties
+            },
+            headers={
+                "Authorization": f"Api-Key {settings.amplitude_secret_key}"
+            },
+            timeout=15.0,
+        )
+        
+        if response.status_code == 200:
+            data = response.json()
+            user_data = data.get("userData", {})
+            
+            print(f"{GREEN}[Amplitude AI] ✓ Fetched AI profile successfully{RESET}")
             
-            if response.status_code == 200:
-                data = response.json()
-                user_data = data.get("userData", {})
+            # Extract and structure the AI-derived insights
+            amp_props = user_data.get("amp_props") or {}
+            cohort_ids = user_data.get("cohort_ids") or []
+            computations = user_data.get("computations") or {}
+            
+            # Parse any computed properties that might indicate user type
+            ai_insights = {
+                "user_id": user_id,
+                "has_ai_data": bool(amp_props or cohort_ids or computations),
                 
-                print(f"{GREEN}[Amplitude AI] ✓ Fetched AI profile successfully{RESET}")
+                # Amplitude-tracked properties
+                "properties": amp_props,
                 
-                # Extract and structure the AI-derived insights
-                amp_props = user_data.get("amp_props") or {}
-                cohort_ids = user_data.get("cohort_ids") or []
-                computations = user_data.get("computations") or {}
+                # Behavioral cohorts (ML-segmented)
+                "cohorts": cohort_ids,
+                "cohort_count": len(cohort_ids),
                 
-                # Parse any computed properties that might indicate user type
-                ai_insights = {
-                    "user_id": user_id,
-                    "has_ai_data": bool(amp_props or cohort_ids or computations),
-                    
-                    # Amplitude-tracked properties
-                    "properties": amp_props,
-                    
-                    # Behavioral cohorts (ML-segmented)
-                    "cohorts": cohort_ids,
-                    "cohort_count": len(cohort_ids),
-                    
-                    # ML-computed properties
-                    "computations": computations,
-                    
-                    # Derived behavioral signals from Amplitude's tracking
-                    "behavioral_signals": {
-                        "first_seen": amp_props.get("first_used"),
-                        "last_seen": amp_props.get("last_used"),
-                        "library": amp_props.get("library"),
-                        # Extract any custom computed properties
-                        "engagement_score": _safe_float(computations.get("engagement_score")),
-                        "skill_level": computations.get("skill_level"),
-                        "user_segment": computations.get("user_segment"),
-                        "churn_risk": _safe_float(computations.get("churn_risk")),
-                        "power_user_score": _safe_float(computations.get("power_user_score")),
-                    },
-                    
-                    # Cohort-based archetype hints (if you set up cohorts in Amplitude)
-                    "archetype_hints": _extract_archetype_hints(cohort_ids),
-                }
+                # ML-computed properties
+                "computations": computations,
                 
-                return ai_insights
+                # Derived behavioral signals from Amplitude's tracking
+                "behavioral_signals": {
+                    "first_seen": amp_props.get("first_used"),
+                    "last_seen": amp_props.get("last_used"),
+                    "library": amp_props.get("library"),
+                    # Extract any custom computed properties
+                    "engagement_score": _safe_float(computations.get("engagement_score")),
+                    "skill_level": computations.get("skill_level"),
+                    "user_segment": computations.get("user_segment"),
+                    "churn_risk": _safe_float(computations.get("churn_risk")),
+                    "power_user_score": _safe_float(computations.get("power_user_score")),
+                },
                 
-            elif response.status_code == 401:
-                print(f"{RED}[Amplitude AI] ✗ Authentication failed - check secret key{RESET}")
-                return {"error": "Authentication failed", "status": 401}
-            else:
-                print(f"{RED}[Amplitude AI] ✗ Failed - HTTP {response.status_code}: {response.text[:100]}{RESET}")
-                return {"error": f"HTTP {response.status_code}", "status": response.status_code}
+                # Cohort-based archetype hints (if you set up cohorts in Amplitude)
+                "archetype_hints": _extract_archetype_hints(cohort_ids),
+            }
+            
+            return ai_insights
+            
+        elif response.status_code == 401:
+            print(f"{RED}[Amplitude AI] ✗ Authentication failed - check secret key{RESET}")
+            return {"error": "Authentication failed", "status": 401}
+        else:
+            print(f"{RED}[Amplitude AI] ✗ Failed - HTTP {response.status_code}: {response.text[:100]}{RESET}")
+            return {"error": f"HTTP {response.status_code}", "status": response.status_code}
                 
     except Exception as e:
         print(f"{RED}[Amplitude AI] ✗ Error fetching AI profile: {e}{RESET}")
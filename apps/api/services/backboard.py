@@ -29,6 +29,9 @@ from backboard import BackboardClient
 
 GEMINI_API_URL = "https://generativelanguage.googleapis.com/v1beta/models"
 
+# How many of the most recent code snapshots contextual hints read code from
+CONTEXTUAL_HINT_CODE_SNAPSHOTS = 5
+
 # ANSI color codes for terminal output
 CYAN = "\033[96m"
 MAGENTA = "\033[95m"
@@ -43,6 +46,41 @@ DIM = "\033[2m"
 _assistant_cache: dict[str, str] = {}  # assistant_name -> assistant_id
 _thread_cache: dict[str, str] = {}  # cache_key -> thread_id
 
+# Clients shared by every BackboardService (one is constructed per request),
+# so calls reuse pooled connections instead of reconnecting each time.
+_backboard_client: Optional[BackboardClient] = None
+_http_client: httpx.AsyncClient | None = None
+
+
+def _get_backboard_client(api_key: str) -> BackboardClient:
+    global _backboard_client
+    if _backboard_client is None:
+        _backboard_client = BackboardClient(api_key=api_key)
+        print(f"{DIM}[Backboard] Initialized with API key: {api_key[:8]}...{api_key[-4:]}{RESET}")
+    return _backboard_client
+
+
+def _get_http_client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=30.0,
+            limits=httpx.Limits(
+                max_connections=100,
+                max_keepalive_connections=20,
+                keepalive_expiry=60.0,
+            ),
+        )
+    return _http_client
+
+
+async def close_backboard_client():
+    """Close the shared Gemini HTTP client (called on app shutdown)."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
 
 class BackboardService:
     """
@@ -55,14 +93,11 @@ class BackboardService:
         self.api_key = settings.backboard_api_key
         self.gemini_api_key = settings.gemini_api_key
         self.user_id = user_id
-        self.client = BackboardClient(api_key=self.api_key) if self.api_key else None
+        self.client = _get_backboard_client(self.api_key) if self.api_key else None
         # In-memory conversation history for Gemini (keyed by session)
         self._gemini_history: dict[str, list] = {}
-        
-        # Debug: Log API key status on first init
-        if self.api_key:
-            print(f"{DIM}[Backboard] Initialized with API key: {self.api_key[:8]}...{self.api_key[-4:]}{RESET}")
-        else:
+
+        if not self.api_key:
             print(f"{YELLOW}[Backboard] WARNING: No API key configured - will use Gemini fallback{RESET}")
 
     async def _get_or_create_assistant(self, name: str, system_prompt: str) -> Optional[str]:
@@ -325,37 +360,37 @@ class BackboardService:
                     "parts": [{"text": system_instruction}]
                 }
 
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    f"{GEMINI_API_URL}/{model_name}:generateContent?key={self.gemini_api_key}",
-                    headers={"Content-Type": "application/json"},
-                    json=payload,
-                )
-                response.raise_for_status()
+            client = _get_http_client()
+            response = await client.post(
+                f"{GEMINI_API_URL}/{model_name}:generateContent?key={self.gemini_api_key}",
+                headers={"Content-Type": "application/json"},
+                json=payload,
+            )
+            response.raise_for_status()
 
-                result = response.json()
-                response_text = result["candidates"][0]["content"]["parts"][0]["text"]
+            result = response.json()
+            response_text = result["candidates"][0]["content"]["parts"][0]["text"]
 
-                print(f"{GREEN}[Gemini] ✓ {model_name} responded ({len(response_text)} chars){RESET}")
-                print(f"{DIM}[Gemini] Response: {response_text[:150]}...{RESET}" if len(response_text) > 150 else f"{DIM}[Gemini] Response: {response_text}{RESET}")
+            print(f"{GREEN}[Gemini] ✓ {model_name} responded ({len(response_text)} chars){RESET}")
+            print(f"{DIM}[Gemini] Response: {response_text[:150]}...{RESET}" if len(response_text) > 150 else f"{DIM}[Gemini] Response: {response_text}{RESET}")
 
-                if session_key:
-                    if session_key not in self._gemini_history:
-                        self._gemini_history[session_key] = []
+            if session_key:
+                if session_key not in self._gemini_history:
+                    self._gemini_history[session_key] = []
 
-                    self._gemini_history[session_key].append({
-                        "role": "user",
-                        "parts": [{"text": prompt}]
-                    })
-                    self._gemini_history[session_key].append({
-                        "role": "model",
-                        "parts": [{"text": response_text}]
-                    })
+                self._gemini_history[session_key].append({
+                    "role": "user",
+                    "parts": [{"text": prompt}]
+                })
+                self._gemini_history[session_key].append({
+                    "role": "model",
+                    "parts": [{"text": response_text}]
+                })
 
-                    if len(self._gemini_history[session_key]) > 40:
-                        self._gemini_history[session_key] = self._gemini_history[session_key][-40:]
+                if len(self._gemini_history[session_key]) > 40:
+                    self._gemini_history[session_key] = self._gemini_history[session_key][-40:]
 
-                return response_text
+            return response_text
 
         except Exception as e:
             print(f"{RED}[Gemini] ✗ Error: {e}{RESET}")
@@ -1227,7 +1262,7 @@ This is attempt #{attempt_count}. Please provide a helpful hint."""
         print(f"\n{CYAN}[Hint] Generating CONTEXTUAL hint (history: {len(code_history)} snapshots, session: {session_id[:12]}...){RESET}")
 
         evolution_summary = []
-        for i, entry in enumerate(code_history[-5:]):
+        for i, entry in enumerate(code_history[-CONTEXTUAL_HINT_CODE_SNAPSHOTS:]):
             error_info = f" (Error: {entry.get('error', 'none')[:50]})" if entry.get('error') else ""
             evolution_summary.append(f"Attempt {i+1}: {len(entry.get('code', ''))} chars{error_info}")
 
@@ -0,0 +1,99 @@
+"""
+Buffered Event Writer
+
+Analytics events that the request itself never reads back are buffered here
+and written with a single unordered insert_many per short window, instead of
+an insert_one round trip inside every request. Once a batch is stored its
+events are queued for Amplitude, so the forwarded flag update can never run
+ahead of the insert.
+"""
+
+import asyncio
+from dataclasses import dataclass
+
+from pymongo.errors import BulkWriteError
+
+from db.collections import Collections
+from services.amplitude import enqueue_amplitude_event
+
+EVENT_FLUSH_WINDOW_SECONDS = 0.05
+EVENT_MAX_BATCH = 100
+
+
+@dataclass
+class _PendingEvent:
+    doc: dict
+    timestamp_ms: int
+    amplitude_properties: dict
+
+
+class EventWriter:
+    """Buffers event inserts and writes them in batches."""
+
+    def __init__(
+        self,
+        window: float = EVENT_FLUSH_WINDOW_SECONDS,
+        max_batch: int = EVENT_MAX_BATCH,
+    ):
+        self._window = window
+        self._max_batch = max_batch
+        self._pending: list[_PendingEvent] = []
+        self._flush_task: asyncio.Task | None = None
+        self._batch_full = asyncio.Event()
+
+    def submit(self, event_doc: dict, timestamp_ms: int, amplitude_properties: dict) -> None:
+        """Queue an event document (with its _id already set) for insertion.
+
+        After it is stored it is forwarded to Amplitude with the given
+        properties under the document's user_id and event_type.
+        """
+        self._pending.append(_PendingEvent(event_doc, timestamp_ms, amplitude_properties))
+        if len(self._pending) >= self._max_batch:
+            self._batch_full.set()
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        while self._pending:
+            if len(self._pending) < self._max_batch:
+                try:
+                    await asyncio.wait_for(self._batch_full.wait(), self._window)
+                except asyncio.TimeoutError:
+                    pass
+            self._batch_full.clear()
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Write every buffered event now (also called on app shutdown)."""
+        while self._pending:
+            batch = self._pending[:self._max_batch]
+            del self._pending[:self._max_batch]
+            await self._write(batch)
+
+    async def _write(self, batch: list[_PendingEvent]) -> None:
+        failed: set[int] = set()
+        try:
+            await Collections.events().insert_many(
+                [event.doc for event in batch], ordered=False
+            )
+        except BulkWriteError as e:
+            # Unordered, so only the reported documents are missing
+            failed = {err["index"] for err in e.details.get("writeErrors", [])}
+            print(f"[EventWriter] Failed to insert {len(failed)} of {len(batch)} events: {e}")
+        except Exception as e:
+            print(f"[EventWriter] Failed to insert {len(batch)} events: {e}")
+            return
+
+        for i, event in enumerate(batch):
+            if i in failed:
+                continue
+            enqueue_amplitude_event(
+                event_id=event.doc["_id"],
+                user_id=event.doc["user_id"],
+                event_type=event.doc["event_type"],
+                timestamp=event.timestamp_ms,
+                properties=event.amplitude_properties,
+            )
+
+
+event_writer = EventWriter()
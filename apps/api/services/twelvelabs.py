@@ -18,6 +18,7 @@ from datetime import datetime
 from typing import Optional
 from config import get_settings
 from db.collections import Collections
+from utils.files import drop_page_cache
 
 TWELVELABS_API_URL = "https://api.twelvelabs.io/v1.3"
 
@@ -556,6 +557,10 @@ async def upload_video_to_twelvelabs(
                 "twelvelabs_not_configured": True,
             }},
         )
+        await Collections.passports().update_one(
+            {"interview_video_id": video_id},
+            {"$set": {"interview_video_ready": True}},
+        )
         return
 
     try:
@@ -605,29 +610,31 @@ async def upload_video_to_twelvelabs(
                 return
 
         async with httpx.AsyncClient() as client:
-            # Upload video - read file content into memory first for reliable async operation
+            # Upload video - stream the file from disk instead of buffering it in memory
             print(f"[TwelveLabs] Uploading video file: {upload_file_path}")
             with open(upload_file_path, "rb") as f:
-                file_content = f.read()
+                # Debug: Log file size and first bytes to help diagnose issues
+                file_size = os.fstat(f.fileno()).st_size
+                print(f"[TwelveLabs] File size: {file_size} bytes ({file_size / 1024 / 1024:.2f} MB)")
+                print(f"[TwelveLabs] First 12 bytes (hex): {f.read(12).hex()}")
+                f.seek(0)
 
-            # Debug: Log file size and first bytes to help diagnose issues
-            file_size = len(file_content)
-            print(f"[TwelveLabs] File size: {file_size} bytes ({file_size / 1024 / 1024:.2f} MB)")
-            print(f"[TwelveLabs] First 12 bytes (hex): {file_content[:12].hex()}")
+                if file_size < 10000:  # Less than 10KB is suspicious
+                    print(f"[TwelveLabs] WARNING: File is very small, may not be a valid video")
 
-            if file_size < 10000:  # Less than 10KB is suspicious
-                print(f"[TwelveLabs] WARNING: File is very small, may not be a valid video")
+                files = {"video_file": (os.path.basename(upload_file_path), f, content_type)}
+                data = {"index_id": index_id}
 
-            files = {"video_file": (os.path.basename(upload_file_path), file_content, content_type)}
-            data = {"index_id": index_id}
+                response = await client.post(
+                    f"{TWELVELABS_API_URL}/tasks",
+                    headers=headers,
+                    files=files,
+                    data=data,
+                    timeout=300.0,
+                )
 
-            response = await client.post(
-                f"{TWELVELABS_API_URL}/tasks",
-                headers=headers,
-                files=files,
-                data=data,
-                timeout=300.0,
-            )
+                # The uploaded bytes won't be read again from this process
+                drop_page_cache(f.fileno())
 
             if response.status_code not in [200, 201]:
                 print(f"[TwelveLabs] ERROR: Upload failed: {response.text}")
@@ -702,6 +709,7 @@ async def upload_video_to_twelvelabs(
                         {
                             "$set": {
                                 "interview_video_id": video_id,
+                                "interview_video_ready": True,
                                 "interview_summary": summary,
                                 "interview_highlights": highlights,
                                 "communication_scores": communication,
@@ -8,6 +8,7 @@ import httpx
 from typing import List, Dict, Tuple, Optional
 from datetime import datetime, timezone
 import json
+from pymongo.errors import DuplicateKeyError
 
 from services.twelvelabs import TwelveLabsService
 from models.behavioral_analysis import (
@@ -552,14 +553,25 @@ async def analyze_video_background(
             twelvelabs_video_id, analysis
         )
 
-        # Store report in database
-        await Collections.db().proctoring_reports.insert_one({
+        # Store report in database, replacing any earlier report for the
+        # session (session_id is unique)
+        report_filter = {"session_id": session_id}
+        report_update = {"$set": {
             "video_id": video_id,
             "session_id": session_id,
             "user_id": user_id,
             "report": report,
             "created_at": datetime.now(timezone.utc)
-        })
+        }}
+        try:
+            await Collections.db().proctoring_reports.update_one(
+                report_filter, report_update, upsert=True
+            )
+        except DuplicateKeyError:
+            # A concurrent upsert inserted first; overwrite its report
+            await Collections.db().proctoring_reports.update_one(
+                report_filter, report_update
+            )
 
         print(f"Background analysis complete for video {video_id}. Score: {analysis.overall_integrity_score:.2f}")
 
@@ -0,0 +1,142 @@
+"""
+Violation Coalescing Queue
+
+Proctoring violations tend to arrive in bursts (e.g. a tab switch fires
+repeatedly while the candidate alt-tabs). The first violation of a burst is
+written straight to MongoDB by the route, which also validates the session.
+Violations reported for the same session within a short window afterwards are
+buffered here and written with a single $push when the window closes.
+Identical consecutive violations are merged into one entry with a count.
+Open windows are flushed before a session is ended and on app shutdown.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+
+from db.collections import Collections
+from models.proctoring import ProctoringStatus
+
+logger = logging.getLogger("proctoring")
+
+# Only the most recent violations are kept inline on the session document;
+# the full history lives in the violation_events collection.
+MAX_SESSION_VIOLATIONS = 500
+
+COALESCE_WINDOW_SECONDS = 0.1
+
+
+@dataclass
+class _PendingBatch:
+    user_id: str
+    task_id: str
+    violations: list[dict] = field(default_factory=list)
+    flush_task: asyncio.Task | None = None
+
+
+class ViolationQueue:
+    """Per-session buffer that coalesces bursts of violation writes."""
+
+    def __init__(self, window: float = COALESCE_WINDOW_SECONDS):
+        self._window = window
+        self._pending: dict[str, _PendingBatch] = {}
+        # Window tasks by session, kept until their write has finished
+        self._tasks: dict[asyncio.Task, str] = {}
+
+    def coalesce(self, session_id: str, user_id: str, violation: dict) -> str | None:
+        """Add a violation to the session's open burst window.
+
+        Returns the session's task_id if the violation was buffered, or None if
+        no window is open and the caller must write (and validate) it directly.
+        """
+        batch = self._pending.get(session_id)
+        if batch is None or batch.user_id != user_id:
+            return None
+
+        last = batch.violations[-1] if batch.violations else None
+        if (
+            last is not None
+            and last["violation_type"] == violation["violation_type"]
+            and last.get("details") == violation.get("details")
+        ):
+            last["count"] = last.get("count", 1) + violation.get("count", 1)
+        else:
+            batch.violations.append(violation)
+
+        return batch.task_id
+
+    def open_window(self, session_id: str, user_id: str, task_id: str) -> None:
+        """Start buffering violations for a session that was just validated."""
+        if session_id in self._pending:
+            return
+
+        batch = _PendingBatch(user_id=user_id, task_id=task_id)
+        batch.flush_task = asyncio.create_task(self._flush_later(session_id))
+        self._tasks[batch.flush_task] = session_id
+        batch.flush_task.add_done_callback(lambda task: self._tasks.pop(task, None))
+        self._pending[session_id] = batch
+
+    async def _flush_later(self, session_id: str) -> None:
+        await asyncio.sleep(self._window)
+        batch = self._pending.pop(session_id, None)
+        if batch is not None:
+            await self._write(session_id, batch)
+
+    async def flush(self, session_id: str | None = None) -> None:
+        """Write buffered violations now, for one session or for all of them.
+
+        Also waits for window flushes that are already writing, so once this
+        returns every violation reported so far has been stored.
+        """
+        session_ids = list(self._pending) if session_id is None else [session_id]
+        for sid in session_ids:
+            batch = self._pending.pop(sid, None)
+            if batch is None:
+                continue
+            # Popped before its window closed, so the task is still sleeping
+            batch.flush_task.cancel()
+            await self._write(sid, batch)
+
+        writing = [
+            task for task, sid in list(self._tasks.items())
+            if session_id is None or sid == session_id
+        ]
+        if writing:
+            await asyncio.gather(*writing, return_exceptions=True)
+
+    async def _write(self, session_id: str, batch: _PendingBatch) -> None:
+        if not batch.violations:
+            return
+
+        count = sum(v.get("count", 1) for v in batch.violations)
+        try:
+            result = await Collections.proctoring_sessions().update_one(
+                {
+                    "session_id": session_id,
+                    "user_id": batch.user_id,
+                    "status": ProctoringStatus.ACTIVE.value,
+                },
+                {
+                    "$push": {
+                        "violations": {
+                            "$each": batch.violations,
+                            "$slice": -MAX_SESSION_VIOLATIONS,
+                        }
+                    },
+                    "$inc": {"violation_count": count},
+                },
+            )
+        except Exception:
+            logger.exception(
+                "Failed to flush %d buffered violations for session %s", count, session_id
+            )
+            return
+
+        if result.matched_count == 0:
+            logger.warning(
+                "Dropped %d buffered violations for session %s: session is no longer active",
+                count, session_id,
+            )
+
+
+violation_queue = ViolationQueue()
@@ -1,4 +1,5 @@
 from .security import hash_password, verify_password
 from .jwt import create_access_token, verify_token
+from .cache import AsyncTTLCache
 
-__all__ = ["hash_password", "verify_password", "create_access_token", "verify_token"]
+__all__ = ["hash_password", "verify_password", "create_access_token", "verify_token", "AsyncTTLCache"]
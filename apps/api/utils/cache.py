@@ -0,0 +1,74 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class AsyncTTLCache:
+    """In-process LRU cache with a per-entry TTL for async loaders.
+
+    Concurrent misses for the same key share a single pending load, so a burst
+    of requests for a cold key only hits the backing store once. Exceptions are
+    not cached. A load that is still in flight when its key is invalidated
+    still answers its waiters but is not stored, so a write followed by
+    invalidate() can never be masked by a value read before the write.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._entries: OrderedDict[Hashable, tuple[Any, float]] = OrderedDict()
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+        self._generations: dict[Hashable, int] = {}
+        self._epoch = 0
+
+    async def get(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                return value
+            del self._entries[key]
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        generation = self._generation(key)
+        pending = asyncio.ensure_future(loader())
+        self._inflight[key] = pending
+        try:
+            value = await asyncio.shield(pending)
+            stale = self._generation(key) != generation
+        finally:
+            if self._inflight.get(key) is pending:
+                del self._inflight[key]
+            if key not in self._inflight:
+                # Only loads still in flight need to see later invalidations
+                self._generations.pop(key, None)
+
+        if not stale:
+            self.set(key, value)
+        return value
+
+    def _generation(self, key: Hashable) -> tuple[int, int]:
+        return self._epoch, self._generations.get(key, 0)
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = (value, time.monotonic() + self._ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable | None = None) -> None:
+        """Drop one key, or the whole cache when no key is given."""
+        if key is None:
+            self._entries.clear()
+            self._inflight.clear()
+            self._generations.clear()
+            self._epoch += 1
+        else:
+            self._entries.pop(key, None)
+            if self._inflight.pop(key, None) is not None:
+                self._generations[key] = self._generations.get(key, 0) + 1
@@ -0,0 +1,37 @@
+import os
+from typing import BinaryIO
+
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1 MiB
+
+
+def drop_page_cache(fd: int) -> None:
+    """Advise the kernel that a file's cached pages won't be needed again.
+
+    Large one-shot video files otherwise evict more useful pages (e.g. the
+    MongoDB working set) from the page cache. No-op where unsupported.
+    """
+    if hasattr(os, "posix_fadvise"):
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        except OSError:
+            pass
+
+
+def save_upload(src: BinaryIO, file_path: str, size_hint: int | None = None) -> int:
+    """Copy an uploaded file to disk in fixed-size chunks, returning its size."""
+    # Chunks larger than the write buffer go straight to write(2) without a copy
+    with open(file_path, "wb") as dst:
+        if size_hint and hasattr(os, "posix_fallocate"):
+            # Reserve the extents up front instead of growing the file per write
+            try:
+                os.posix_fallocate(dst.fileno(), 0, size_hint)
+            except OSError:
+                pass
+        # Read into one reused buffer rather than allocating a bytes per chunk
+        buf = bytearray(UPLOAD_CHUNK_SIZE)
+        view = memoryview(buf)
+        while n := src.readinto(buf):
+            dst.write(view[:n])
+        dst.truncate()
+        drop_page_cache(dst.fileno())
+        return dst.tell()
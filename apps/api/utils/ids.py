@@ -0,0 +1,37 @@
+import os
+import uuid
+
+_POOL_IDS = 256
+
+
+class _RandomPool:
+    """Hands out random bytes from a buffer refilled with one os.urandom call.
+
+    Amortizes the getrandom syscall over many IDs instead of paying it per ID.
+    """
+
+    def __init__(self, refill_size: int):
+        self._refill_size = refill_size
+        self._buf = b""
+        self._pos = 0
+
+    def take(self, n: int) -> bytes:
+        if self._pos + n > len(self._buf):
+            self._buf = os.urandom(max(self._refill_size, n))
+            self._pos = 0
+        chunk = self._buf[self._pos:self._pos + n]
+        self._pos += n
+        return chunk
+
+
+_pool = _RandomPool(16 * _POOL_IDS)
+
+
+def new_uuid4() -> str:
+    """Return a random (version 4) UUID string, like str(uuid.uuid4())."""
+    return str(uuid.UUID(bytes=_pool.take(16), version=4))
+
+
+def new_hex_id() -> str:
+    """Return a random 24-character hex ID (same shape as str(ObjectId()))."""
+    return _pool.take(12).hex()
@@ -0,0 +1,12 @@
+import time
+from datetime import datetime, timezone
+
+
+def utc_now() -> tuple[datetime, int]:
+    """Return the current UTC time as (datetime, epoch milliseconds).
+
+    Both values come from a single clock read, so the datetime stored in
+    MongoDB and the millisecond timestamp sent to Amplitude always agree.
+    """
+    now_ns = time.time_ns()
+    return datetime.fromtimestamp(now_ns / 1e9, tz=timezone.utc), now_ns // 1_000_000
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Recompute each passport's interview_video_ready flag from its interview video.
+
+The API sets passports.interview_video_ready when the interview video finishes
+processing; run this once after deploying that change, or after seeding
+videos directly into the database.
+Usage: python scripts/backfill_interview_video_ready.py
+"""
+
+import asyncio
+import os
+from motor.motor_asyncio import AsyncIOMotorClient
+
+MONGODB_URI = os.environ.get("MONGODB_URI", "mongodb://localhost:27017")
+DATABASE_NAME = os.environ.get("DATABASE_NAME", "proof_of_skill")
+
+
+async def backfill_interview_video_ready(db):
+    """Set interview_video_ready on every passport from its video's status."""
+    ready_ids = await db.videos.distinct("_id", {"status": "ready"})
+
+    await db.passports.update_many({}, {"$set": {"interview_video_ready": False}})
+    result = await db.passports.update_many(
+        {"interview_video_id": {"$in": ready_ids}},
+        {"$set": {"interview_video_ready": True}},
+    )
+
+    print(f"  Backfilled interview_video_ready ({result.modified_count} passports with a ready video)")
+
+
+async def main():
+    client = AsyncIOMotorClient(MONGODB_URI)
+    db = client[DATABASE_NAME]
+
+    await backfill_interview_video_ready(db)
+
+    client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
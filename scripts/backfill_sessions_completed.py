@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Recompute each user's sessions_completed counter from their submitted sessions.
+
+The API increments users.sessions_completed when a session is first
+submitted; run this once after deploying that change, or after seeding
+sessions directly into the database.
+Usage: python scripts/backfill_sessions_completed.py
+"""
+
+import asyncio
+import os
+from motor.motor_asyncio import AsyncIOMotorClient
+
+MONGODB_URI = os.environ.get("MONGODB_URI", "mongodb://localhost:27017")
+DATABASE_NAME = os.environ.get("DATABASE_NAME", "proof_of_skill")
+
+
+async def backfill_sessions_completed(db):
+    """Set sessions_completed on every user to their submitted session count."""
+    await db.users.update_many({}, {"$set": {"sessions_completed": 0}})
+
+    await db.sessions.aggregate([
+        {"$match": {"submitted": True}},
+        {"$group": {"_id": "$user_id", "sessions_completed": {"$sum": 1}}},
+        {"$merge": {
+            "into": "users",
+            "on": "_id",
+            "whenMatched": [{"$set": {"sessions_completed": "$$new.sessions_completed"}}],
+            "whenNotMatched": "discard",
+        }},
+    ]).to_list(length=None)
+
+    updated = await db.users.count_documents({"sessions_completed": {"$gt": 0}})
+    print(f"  Backfilled sessions_completed ({updated} users with submissions)")
+
+
+async def main():
+    client = AsyncIOMotorClient(MONGODB_URI)
+    db = client[DATABASE_NAME]
+
+    await backfill_sessions_completed(db)
+
+    client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
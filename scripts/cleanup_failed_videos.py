@@ -110,6 +110,7 @@ async def cleanup_failed_videos():
                 {
                     "$set": {
                         "interview_video_id": None,
+                        "interview_video_ready": False,
                         "interview_highlights": [],
                         "interview_summary": None,
                         "communication_scores": None,
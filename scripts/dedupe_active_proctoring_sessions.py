@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+End all but the newest active proctoring session for each (user_id, task_id).
+
+The API keeps at most one active proctoring session per user and task with a
+partial unique index. Databases written by the older find-then-insert start
+path can hold duplicates, which stop that index from being built; run this
+once before deploying the index.
+Usage: python scripts/dedupe_active_proctoring_sessions.py
+"""
+
+import asyncio
+import os
+from datetime import datetime
+from motor.motor_asyncio import AsyncIOMotorClient
+
+MONGODB_URI = os.environ.get("MONGODB_URI", "mongodb://localhost:27017")
+DATABASE_NAME = os.environ.get("DATABASE_NAME", "proof_of_skill")
+
+
+async def dedupe_active_proctoring_sessions(db):
+    """Mark every older duplicate active proctoring session as ended."""
+    duplicates = await db.proctoring_sessions.aggregate([
+        {"$match": {"status": "active"}},
+        {"$sort": {"started_at": -1}},
+        {"$group": {
+            "_id": {"user_id": "$user_id", "task_id": "$task_id"},
+            "ids": {"$push": "$_id"},
+        }},
+        {"$match": {"ids.1": {"$exists": True}}},
+    ]).to_list(length=None)
+
+    # Keep the newest session of each group (first after the sort)
+    stale_ids = [doc_id for group in duplicates for doc_id in group["ids"][1:]]
+    ended = 0
+    if stale_ids:
+        result = await db.proctoring_sessions.update_many(
+            {"_id": {"$in": stale_ids}},
+            {"$set": {"status": "ended", "ended_at": datetime.utcnow()}},
+        )
+        ended = result.modified_count
+
+    print(f"  Ended {ended} duplicate active proctoring sessions ({len(duplicates)} user/task pairs)")
+
+
+async def main():
+    client = AsyncIOMotorClient(MONGODB_URI)
+    db = client[DATABASE_NAME]
+
+    await dedupe_active_proctoring_sessions(db)
+
+    client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
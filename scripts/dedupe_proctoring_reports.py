@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Delete all but the newest stored proctoring report for each session.
+
+The API keeps one report per session with a unique index on
+proctoring_reports.session_id. Earlier versions inserted a new report on
+every analysis, so existing databases can hold duplicates, which stop that
+index from being built; run this once before deploying the index.
+Usage: python scripts/dedupe_proctoring_reports.py
+"""
+
+import asyncio
+import os
+from motor.motor_asyncio import AsyncIOMotorClient
+
+MONGODB_URI = os.environ.get("MONGODB_URI", "mongodb://localhost:27017")
+DATABASE_NAME = os.environ.get("DATABASE_NAME", "proof_of_skill")
+
+
+async def dedupe_proctoring_reports(db):
+    """Delete every older duplicate proctoring report."""
+    duplicates = await db.proctoring_reports.aggregate([
+        {"$sort": {"created_at": -1}},
+        {"$group": {"_id": "$session_id", "ids": {"$push": "$_id"}}},
+        {"$match": {"ids.1": {"$exists": True}}},
+    ]).to_list(length=None)
+
+    # Keep the newest report of each session (first after the sort)
+    stale_ids = [doc_id for group in duplicates for doc_id in group["ids"][1:]]
+    deleted = 0
+    if stale_ids:
+        result = await db.proctoring_reports.delete_many({"_id": {"$in": stale_ids}})
+        deleted = result.deleted_count
+
+    print(f"  Deleted {deleted} duplicate proctoring reports ({len(duplicates)} sessions)")
+
+
+async def main():
+    client = AsyncIOMotorClient(MONGODB_URI)
+    db = client[DATABASE_NAME]
+
+    await dedupe_proctoring_reports(db)
+
+    client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
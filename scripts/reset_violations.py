@@ -51,7 +51,7 @@ async def reset_violations_for_user(display_name: str):
     # Reset violations in proctoring_sessions
     result = await db.proctoring_sessions.update_many(
         {"user_id": user_id},
-        {"$set": {"violations": [], "integrity_score": 1.0, "flagged_for_review": False}}
+        {"$set": {"violations": [], "violation_count": 0, "integrity_score": 1.0, "flagged_for_review": False}}
     )
     print(f"Reset proctoring sessions: {result.modified_count} document(s)")
 
@@ -117,6 +117,7 @@ async def seed_passports(db):
                 },
             ],
             "interview_video_id": None,
+            "interview_video_ready": False,
             "interview_highlights": [],
             "updated_at": datetime.utcnow(),
         }
@@ -181,6 +182,9 @@ async def main():
     await seed_passports(db)
     await seed_sessions(db)
 
+    from backfill_sessions_completed import backfill_sessions_completed
+    await backfill_sessions_completed(db)
+
     # Also seed tasks and jobs
     print("\n=== Seeding Tasks and Jobs ===")
     from seed_tasks import seed_tasks, seed_jobs
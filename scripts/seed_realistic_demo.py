@@ -357,6 +357,9 @@ async def main():
     await seed_passports(db)
     await seed_sessions(db)
 
+    from backfill_sessions_completed import backfill_sessions_completed
+    await backfill_sessions_completed(db)
+
     print("\n" + "=" * 50)
     print("Demo Data Seeded Successfully!")
     print("=" * 50)